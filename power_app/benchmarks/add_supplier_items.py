@@ -0,0 +1,107 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Benchmark: apply_supplier_quotation_items vs the previous linear-scan loop
+
+Measures Python time only (no database, no save):
+    bench --site [site] execute power_app.benchmarks.add_supplier_items.run
+"""
+
+import time
+from types import SimpleNamespace
+
+from frappe.utils import flt
+
+from power_app.quotation import apply_supplier_quotation_items
+
+# Selecting 5,000 rows into a 5,000-line quotation must stay under this
+TIME_LIMIT_SECONDS = 1.0
+
+
+class FakeQuotation:
+    """Minimal stand-in for the Quotation document (items + append + precision)"""
+
+    def __init__(self, item_count):
+        self.items = [
+            SimpleNamespace(
+                name=f"QI-{i:05d}", item_code=f"ITEM-{i:05d}", qty=1 + i % 7, rate=0, net_rate=0, amount=0,
+                net_amount=0, custom_supplier_quotation=None, custom_supplier_quotation_item_rate=0,
+                conversion_factor=1,
+            )
+            for i in range(item_count)
+        ]
+
+    def precision(self, fieldname, parentfield=None):
+        return 2
+
+    def append(self, fieldname, row):
+        # Child rows get their name on save
+        row = SimpleNamespace(name=None, **row)
+        self.items.append(row)
+        return row
+
+
+def make_selection(count):
+    return [
+        {
+            "item_id": f"SQI-{i:05d}",
+            "supplier_quotation": f"SQ-{i % 40:03d}",
+            # Half of the selection matches existing rows, half is new
+            "item_code": f"ITEM-{i * 2:05d}",
+            "rate": 10 + i % 100,
+            "qty": 1 + i % 5,
+            "uom": "Nos",
+            "item_name": f"Item {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_apply(quotation, selected_items, sq_descriptions, item_descriptions):
+    """Matching logic of add_items_from_supplier_quotations before the item_code index"""
+    for item_data in selected_items:
+        existing_item = None
+        for q_item in quotation.items:
+            if q_item.item_code == item_data.get("item_code"):
+                existing_item = q_item
+                break
+
+        supplier_rate = flt(item_data.get("rate"))
+        if existing_item:
+            existing_item.rate = supplier_rate
+            existing_item.net_rate = supplier_rate
+            existing_item.amount = supplier_rate * flt(existing_item.qty)
+            existing_item.net_amount = supplier_rate * flt(existing_item.qty)
+            existing_item.custom_supplier_quotation = item_data.get("supplier_quotation")
+            existing_item.custom_supplier_quotation_item_rate = supplier_rate
+        else:
+            quotation.append("items", {
+                "item_code": item_data.get("item_code"),
+                "qty": flt(item_data.get("qty")),
+                "rate": supplier_rate,
+                "description": sq_descriptions.get(item_data.get("item_id"))
+                or item_descriptions.get(item_data.get("item_code")),
+            })
+
+
+def run(selected_count=5000, quotation_lines=5000):
+    selected_items = make_selection(selected_count)
+    sq_descriptions = {d["item_id"]: f"Offer {d['item_id']}" for d in selected_items}
+    item_descriptions = {d["item_code"]: d["item_name"] for d in selected_items}
+
+    timings = {}
+    for label, func in (("legacy", legacy_apply), ("indexed", apply_supplier_quotation_items)):
+        quotation = FakeQuotation(quotation_lines)
+        start = time.perf_counter()
+        func(quotation, selected_items, sq_descriptions, item_descriptions)
+        timings[label] = time.perf_counter() - start
+        print(f"{label:>8}: {timings[label] * 1000:10.1f} ms ({len(quotation.items)} rows after apply)")
+
+    if timings["indexed"] > TIME_LIMIT_SECONDS:
+        raise AssertionError(
+            f"apply_supplier_quotation_items took {timings['indexed']:.2f}s "
+            f"(limit {TIME_LIMIT_SECONDS}s)"
+        )
+
+    return timings
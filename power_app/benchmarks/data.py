@@ -0,0 +1,246 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Synthetic procurement data for the benchmark suite
+
+Builds a full chain on the current site, without sending anything out:
+    Quotation (draft, with expenses)
+    → Material Request (submitted)
+    → Request for Quotation (submitted, supplier emails off)
+    → one Supplier Quotation per supplier (submitted, with expenses)
+
+Masters (Items, Suppliers, Customer, Service Expense Types, Expense Template)
+are created once with a "PA-Bench" prefix and reused on later runs.
+"""
+
+import random
+
+import frappe
+from frappe.utils import add_days, nowdate
+
+PREFIX = "PA-Bench"
+
+
+def make_procurement_chain(items=20, suppliers=3, expenses=3, company=None, seed=1):
+    """
+    Create one Quotation → Material Request → RFQ → Supplier Quotations chain
+
+    Args:
+        items: Quotation lines (one Item each)
+        suppliers: Supplier Quotations made from the RFQ
+        expenses: Service Expense rows on the Quotation and every Supplier Quotation
+        company: Company to use (defaults to the default Company)
+        seed: Random seed for quantities and rates
+
+    Returns:
+        frappe._dict: company, quotation, material_request, request_for_quotation,
+            supplier_quotations, item_codes, expense_template
+    """
+    from erpnext.buying.doctype.request_for_quotation.request_for_quotation import (
+        make_supplier_quotation_from_rfq,
+    )
+    from erpnext.stock.doctype.material_request.material_request import (
+        make_request_for_quotation,
+    )
+
+    from power_app.material_request import make_material_request_from_quotation
+
+    rng = random.Random(seed)
+    company = company or get_benchmark_company()
+    warehouse = get_leaf("Warehouse", {"company": company})
+    item_codes = make_items(items)
+    supplier_names = make_suppliers(suppliers)
+    expense_rows = make_expense_rows(company, expenses, rng)
+    expense_template = make_expense_template(expense_rows)
+
+    # Quotation
+    quotation = frappe.get_doc({
+        "doctype": "Quotation",
+        "quotation_to": "Customer",
+        "party_name": make_customer(),
+        "company": company,
+        "transaction_date": nowdate(),
+        "valid_till": add_days(nowdate(), 30),
+        "custom_item_margin": 10,
+        "items": [
+            {
+                "item_code": item_code,
+                "qty": rng.randint(1, 50),
+                "rate": round(rng.uniform(10, 500), 2),
+                "warehouse": warehouse,
+            }
+            for item_code in item_codes
+        ],
+        "custom_service_expense_table": expense_rows,
+    }).insert(ignore_permissions=True)
+
+    # Material Request
+    material_request = make_material_request_from_quotation(quotation.name)
+    material_request.schedule_date = add_days(nowdate(), 7)
+    for row in material_request.items:
+        row.schedule_date = material_request.schedule_date
+        row.warehouse = row.warehouse or warehouse
+    material_request.insert(ignore_permissions=True)
+    material_request.submit()
+
+    # Request for Quotation (no supplier emails)
+    rfq = make_request_for_quotation(material_request.name)
+    rfq.message_for_supplier = "Benchmark"
+    for supplier in supplier_names:
+        rfq.append("suppliers", {"supplier": supplier, "send_email": 0})
+    rfq.insert(ignore_permissions=True)
+    rfq.submit()
+
+    # Supplier Quotations
+    supplier_quotations = []
+    for supplier in supplier_names:
+        sq = make_supplier_quotation_from_rfq(rfq.name, for_supplier=supplier)
+        for row in sq.items:
+            row.rate = round(rng.uniform(5, 400), 2)
+        sq.custom_approve_rfq_technical_specification = 1
+        sq.custom_delivery_time = add_days(nowdate(), rng.randint(3, 30))
+        sq.valid_till = add_days(nowdate(), 30)
+        sq.custom_expense_template = expense_template
+        sq.set("custom_service_expense_table", [dict(row) for row in expense_rows])
+        sq.insert(ignore_permissions=True)
+        sq.submit()
+        supplier_quotations.append(sq.name)
+
+    return frappe._dict(
+        company=company,
+        quotation=quotation.name,
+        material_request=material_request.name,
+        request_for_quotation=rfq.name,
+        supplier_quotations=supplier_quotations,
+        item_codes=item_codes,
+        expense_template=expense_template,
+    )
+
+
+def get_benchmark_data_counts():
+    """
+    Rows of benchmark data on the site, to check that a run left nothing behind
+
+    Returns:
+        dict: {DocType: count} for PA-Bench masters and every document line
+            of a PA-Bench Item
+    """
+    item_filter = {"item_code": ["like", f"{PREFIX}-%"]}
+    counts = {
+        "Item": frappe.db.count("Item", item_filter),
+        "Supplier": frappe.db.count("Supplier", {"supplier_name": ["like", f"{PREFIX}%"]}),
+        "Customer": frappe.db.count("Customer", {"customer_name": ["like", f"{PREFIX}%"]}),
+        "Expense Template": frappe.db.count("Expense Template", {"name": ["like", f"{PREFIX}%"]}),
+        "Supplier Offer": frappe.db.count("Supplier Offer", item_filter),
+    }
+    for doctype in (
+        "Quotation Item",
+        "Material Request Item",
+        "Request for Quotation Item",
+        "Supplier Quotation Item",
+        "Sales Order Item",
+    ):
+        counts[doctype] = frappe.db.count(doctype, item_filter)
+
+    return counts
+
+
+def get_benchmark_company():
+    company = frappe.defaults.get_global_default("company") or frappe.db.get_value("Company", {})
+    if not company:
+        frappe.throw("The benchmark suite needs a site with at least one Company")
+    return company
+
+
+def get_leaf(doctype, filters=None):
+    """First non-group record of a tree DocType"""
+    return frappe.db.get_value(doctype, {"is_group": 0, **(filters or {})}, "name", order_by="creation")
+
+
+def make_items(count):
+    item_group = get_leaf("Item Group")
+    item_codes = [f"{PREFIX}-Item-{i:05d}" for i in range(count)]
+    existing = set(frappe.get_all("Item", filters={"name": ["in", item_codes]}, pluck="name"))
+
+    for item_code in item_codes:
+        if item_code in existing:
+            continue
+        frappe.get_doc({
+            "doctype": "Item",
+            "item_code": item_code,
+            "item_name": item_code,
+            "item_group": item_group,
+            "stock_uom": "Nos",
+            "is_stock_item": 1,
+            "is_sales_item": 1,
+            "is_purchase_item": 1,
+        }).insert(ignore_permissions=True)
+
+    return item_codes
+
+
+def make_suppliers(count):
+    supplier_group = get_leaf("Supplier Group")
+    names = []
+    for i in range(count):
+        supplier_name = f"{PREFIX} Supplier {i:03d}"
+        name = frappe.db.get_value("Supplier", {"supplier_name": supplier_name})
+        if not name:
+            name = frappe.get_doc({
+                "doctype": "Supplier",
+                "supplier_name": supplier_name,
+                "supplier_group": supplier_group,
+            }).insert(ignore_permissions=True).name
+        names.append(name)
+
+    return names
+
+
+def make_customer():
+    customer_name = f"{PREFIX} Customer"
+    name = frappe.db.get_value("Customer", {"customer_name": customer_name})
+    if not name:
+        name = frappe.get_doc({
+            "doctype": "Customer",
+            "customer_name": customer_name,
+            "customer_group": get_leaf("Customer Group"),
+            "territory": get_leaf("Territory"),
+        }).insert(ignore_permissions=True).name
+
+    return name
+
+
+def make_expense_rows(company, count, rng):
+    account = frappe.get_cached_value("Company", company, "default_expense_account")
+    rows = []
+    for i in range(count):
+        expense_type = f"{PREFIX} Expense {i:03d}"
+        if not frappe.db.exists("Service Expense Type", expense_type):
+            frappe.get_doc({
+                "doctype": "Service Expense Type",
+                "service_expense_type": expense_type,
+                "company": company,
+                "default_account": account,
+            }).insert(ignore_permissions=True)
+
+        rows.append({
+            "service_expense_type": expense_type,
+            "company": company,
+            "default_account": account,
+            "amount": round(rng.uniform(50, 1000), 2),
+        })
+
+    return rows
+
+
+def make_expense_template(expense_rows):
+    name = f"{PREFIX} Template {len(expense_rows):03d}"
+    if not frappe.db.exists("Expense Template", name):
+        frappe.get_doc({
+            "doctype": "Expense Template",
+            "expense_template_name": name,
+            "service_expense": [dict(row) for row in expense_rows],
+        }).insert(ignore_permissions=True)
+
+    return name
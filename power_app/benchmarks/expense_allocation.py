@@ -0,0 +1,123 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Micro-benchmark: expense allocation engine vs the previous quotation_validate loop
+
+    bench --site [site] execute power_app.benchmarks.expense_allocation.run
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+from power_app import expense_allocation
+from power_app.expense_allocation import calculate_item_rates
+
+SIZES = (10, 1000, 20000)
+
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            custom_supplier_quotation_item_rate=rng.choice([0, round(rng.uniform(1, 500), 2)]),
+            price_list_rate=rng.choice([0, round(rng.uniform(1, 500), 2)]),
+            rate=round(rng.uniform(1, 500), 2),
+            qty=rng.randint(1, 50),
+            custom_item_expense_amount=0,
+        )
+        for _ in range(count)
+    ]
+
+
+def legacy_loop(items, total_expenses, margin):
+    """Rate / expense logic of quotation_validate before the engine was introduced"""
+    for item in items:
+        if item.custom_supplier_quotation_item_rate > 0:
+            item.rate = item.custom_supplier_quotation_item_rate
+        elif item.price_list_rate > 0:
+            item.rate = item.price_list_rate
+
+    total_item_amount = 0.00
+    for i in items:
+        total_item_amount += i.rate * i.qty
+
+    if total_item_amount != 0 and total_expenses > 0:
+        for i in items:
+            item_amount = i.rate * i.qty
+            expense_per_item = (item_amount / total_item_amount * total_expenses) / i.qty
+            i.rate = i.rate + expense_per_item
+            i.custom_item_expense_amount = expense_per_item * i.qty
+
+    if margin != 0:
+        for i in items:
+            i.rate = i.rate + i.rate * margin / 100
+
+
+def engine(items, total_expenses, margin):
+    rates, expense_amounts = calculate_item_rates(
+        [i.custom_supplier_quotation_item_rate for i in items],
+        [i.price_list_rate for i in items],
+        [i.rate for i in items],
+        [i.qty for i in items],
+        total_expenses,
+        margin,
+        2,
+    )
+    for i, rate, expense_amount in zip(items, rates, expense_amounts):
+        i.rate = rate
+        i.custom_item_expense_amount = expense_amount
+
+
+def rounding_gap(items, total_expenses):
+    """Difference between the total and the sum of the 2-decimal rounded item expenses"""
+    return round(total_expenses - sum(round(i.custom_item_expense_amount, 2) for i in items), 2) + 0.0
+
+
+def run(sizes=SIZES, total_expenses=12345.67, margin=15, repeat=5):
+    numpy_state = "on" if expense_allocation.np is not None else "not installed"
+    print(f"Expense allocation benchmark (NumPy {numpy_state})")
+    print(f"{'rows':>8} {'legacy ms':>12} {'engine ms':>12} {'speedup':>9} {'legacy gap':>11} {'engine gap':>11}")
+
+    results = []
+    for size in sizes:
+        rows = make_rows(size)
+
+        legacy_time = best_time(legacy_loop, rows, total_expenses, margin, repeat)
+        engine_time = best_time(engine, rows, total_expenses, margin, repeat)
+
+        legacy_rows = make_rows_copy(rows)
+        legacy_loop(legacy_rows, total_expenses, margin)
+        engine_rows = make_rows_copy(rows)
+        engine(engine_rows, total_expenses, margin)
+
+        result = {
+            "rows": size,
+            "legacy_ms": legacy_time * 1000,
+            "engine_ms": engine_time * 1000,
+            "legacy_gap": rounding_gap(legacy_rows, total_expenses),
+            "engine_gap": rounding_gap(engine_rows, total_expenses),
+        }
+        results.append(result)
+        print(
+            f"{size:>8} {result['legacy_ms']:>12.3f} {result['engine_ms']:>12.3f} "
+            f"{legacy_time / engine_time:>8.2f}x {result['legacy_gap']:>11.2f} {result['engine_gap']:>11.2f}"
+        )
+
+    return results
+
+
+def best_time(func, rows, total_expenses, margin, repeat):
+    """Best wall time of func over repeat runs, each on a fresh copy of rows"""
+    timings = []
+    for _ in range(repeat):
+        rows_copy = make_rows_copy(rows)
+        start = time.perf_counter()
+        func(rows_copy, total_expenses, margin)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_rows_copy(rows):
+    return [SimpleNamespace(**vars(row)) for row in rows]
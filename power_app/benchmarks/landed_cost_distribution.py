@@ -0,0 +1,96 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Benchmark: landed cost charge distribution, ERPNext per-row loop vs distribute_charges
+
+    bench --site [site] execute power_app.benchmarks.landed_cost_distribution.run
+"""
+
+import random
+import time
+
+from frappe.utils import flt
+
+from power_app.landed_cost_voucher import distribute_charges
+
+SIZES = (100, 5000, 50000)
+
+
+def make_basis(count, seed=7):
+    rng = random.Random(seed)
+    return [round(rng.uniform(0.5, 2500), 2) for _ in range(count)]
+
+
+def erpnext_loop(basis, total_charges, precision):
+    """Arithmetic of ERPNext LandedCostVoucher.set_applicable_charges_on_item"""
+    total_item_cost = 0.0
+    for value in basis:
+        total_item_cost += value
+
+    charges = []
+    total = 0.0
+    for value in basis:
+        charge = flt(flt(value) * (flt(total_charges) / flt(total_item_cost)), precision)
+        charges.append(charge)
+        total += charge
+
+    if total != total_charges:
+        charges[-1] += total_charges - total
+
+    return charges
+
+
+def check_exact_halves(rows=1000, total_charges=25, precision=2):
+    """
+    Every share is an exact half at precision (1000 rows of qty 1 sharing 25
+    gives 0.025 each), the case random data never hits
+
+    Returns:
+        list: (row index, erpnext charge, engine charge) for every row that differs
+    """
+    basis = [1] * rows
+    expected = erpnext_loop(basis, total_charges, precision)
+    charges = distribute_charges(basis, total_charges, precision)
+    return [
+        (idx, expected_charge, charge)
+        for idx, (expected_charge, charge) in enumerate(zip(expected, charges))
+        if expected_charge != charge
+    ]
+
+
+def run(sizes=SIZES, total_charges=98765.43, precision=2, repeat=3):
+    mismatches = check_exact_halves()
+    if mismatches:
+        raise AssertionError(f"Exact halves: {len(mismatches)} row(s) differ from ERPNext, first {mismatches[0]}")
+
+    print(f"{'rows':>8} {'erpnext ms':>12} {'engine ms':>12} {'speedup':>9} {'same':>6}")
+
+    results = []
+    for size in sizes:
+        basis = make_basis(size)
+
+        timings = {}
+        outputs = {}
+        for label, func in (("erpnext", erpnext_loop), ("engine", distribute_charges)):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                outputs[label] = func(basis, total_charges, precision)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = best
+
+        result = {
+            "rows": size,
+            "erpnext_ms": timings["erpnext"] * 1000,
+            "engine_ms": timings["engine"] * 1000,
+            "same_result": outputs["erpnext"] == outputs["engine"],
+        }
+        results.append(result)
+        print(
+            f"{size:>8} {result['erpnext_ms']:>12.2f} {result['engine_ms']:>12.2f} "
+            f"{timings['erpnext'] / timings['engine']:>8.2f}x {str(result['same_result']):>6}"
+        )
+
+    return results
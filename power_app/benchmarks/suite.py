@@ -0,0 +1,375 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Benchmark suite: whitelisted methods and doc_events handlers on synthetic data
+
+Every case runs against one chain from power_app.benchmarks.data, is called
+once to warm caches and then timed REPEAT times. Wall time (median) and SQL
+query count are compared with baseline.json. Cases missing from the
+baseline are listed but do not fail; record them with update_baseline.
+
+    bench --site [site] execute power_app.benchmarks.suite.run
+    bench --site [site] execute power_app.benchmarks.suite.update_baseline
+    bench --site [test_site] run-tests --module power_app.benchmarks.test_benchmarks
+
+Case names are the dotted paths of the timed functions inside the power_app
+package. Every doc_events handler and every @instrument() callable needs a
+case or an entry in NOT_BENCHMARKED (test_benchmarks checks this).
+
+All data is rolled back at the end of run / update_baseline; a case that
+commits fails the run.
+"""
+
+import json
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import frappe
+
+from power_app.benchmarks.data import make_procurement_chain
+from power_app.instrumentation import track_queries
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Chain size the baseline is recorded with
+CHAIN_SIZE = {"items": 20, "suppliers": 3, "expenses": 3}
+REPEAT = 5
+
+# A case regresses when it needs more than
+#   baseline wall time * WALL_TIME_FACTOR + WALL_TIME_SLACK_MS, or
+#   baseline queries * QUERY_COUNT_FACTOR + QUERY_COUNT_SLACK
+WALL_TIME_FACTOR = 2.0
+WALL_TIME_SLACK_MS = 5.0
+QUERY_COUNT_FACTOR = 1.2
+QUERY_COUNT_SLACK = 2
+
+# doc_events handlers and instrumented callables that are not timed directly
+NOT_BENCHMARKED = {
+    # Only enqueue; the per-Quotation work of the jobs is timed as
+    # material_request.insert_material_request / quotation_mapper.insert_sales_order
+    "material_request.make_material_requests_for_quotations",
+    "quotation_mapper.make_sales_orders",
+    # Background jobs that commit after every chunk
+    "material_request.create_material_requests_for_quotations",
+    "quotation_mapper.make_sales_orders_for_chunk",
+    # Reads one Redis hash of a batch enqueued by make_sales_orders
+    "quotation_mapper.get_bulk_sales_order_status",
+    # Post and submit a Journal Entry for a submitted Sales Order
+    # (post_service_expense_journal_entry rolls back the transaction on failure)
+    "sales_order.create_je_from_service_expence",
+    "sales_order.post_service_expense_journal_entry",
+    "sales_order.retry_service_expense_journal_entry",
+}
+
+
+def measure(func, repeat=REPEAT):
+    """
+    Time func after one warm-up call
+
+    Returns:
+        dict: {wall_ms: median wall time, queries: SQL queries of the last call}
+    """
+    func()
+
+    timings = []
+    for _i in range(repeat):
+        with track_queries() as stats:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+
+    return {"wall_ms": round(statistics.median(timings), 3), "queries": stats.queries}
+
+
+def submit_item_rates(doc):
+    """
+    item.update_item_rate_cache on_submit plus the after_commit callback it queues
+
+    The callback never runs under the rollback harness, so it is called directly.
+    """
+    from power_app import item
+
+    item.update_item_rate_cache(doc, "on_submit")
+    item.write_item_rates_through(doc, item.get_invoice_item_rates(doc))
+
+
+def get_cases(chain):
+    """
+    Benchmark cases for a chain from make_procurement_chain
+
+    Returns:
+        dict: {case name: callable}; setup happens here, only the callable is timed
+    """
+    from power_app import (
+        item,
+        material_request,
+        quotation,
+        quotation_mapper,
+        sales_order,
+        service_expenses,
+        supplier_offers,
+        supplier_quotation,
+    )
+    from power_app.power_app.report.supplier_quotation_comparison import (
+        supplier_quotation_comparison,
+    )
+
+    quotation_name = chain.quotation
+    sq_name = chain.supplier_quotations[0]
+
+    # Lowest offer per item, as picked in the selection dialog
+    selected_items = {}
+    for row in quotation.get_supplier_quotation_items(quotation_name):
+        selected_items.setdefault(row.item_code, {
+            "item_id": row.name,
+            "supplier_quotation": row.supplier_quotation,
+            "item_code": row.item_code,
+            "rate": row.rate,
+            "qty": row.qty,
+            "uom": row.uom,
+            "item_name": row.item_name,
+        })
+    selected_items = list(selected_items.values())
+
+    quotation_doc = frappe.get_doc("Quotation", quotation_name)
+    preview_items = [
+        {
+            "item_code": row.item_code,
+            "qty": row.qty,
+            "rate": row.rate,
+            "price_list_rate": row.price_list_rate,
+            "custom_supplier_quotation": row.custom_supplier_quotation,
+            "custom_supplier_quotation_item_rate": row.custom_supplier_quotation_item_rate,
+        }
+        for row in quotation_doc.items
+    ]
+    preview_expenses = [{"amount": row.amount} for row in quotation_doc.custom_service_expense_table]
+
+    approved_quotation = frappe.get_doc("Quotation", quotation_name)
+    approved_quotation.custom_approved = 1
+    sq_doc = frappe.get_doc("Supplier Quotation", sq_name)
+
+    sales_order_doc = frappe.get_doc({
+        "doctype": "Sales Order",
+        "company": chain.company,
+        "transaction_date": quotation_doc.transaction_date,
+        "delivery_date": quotation_doc.valid_till,
+        "items": [{"item_code": row.item_code, "qty": row.qty, "rate": row.rate}
+                  for row in quotation_doc.items],
+        "payment_schedule": [{"payment_amount": 0}, {"invoice_portion": 100, "payment_amount": 1}],
+    })
+    purchase_invoice_doc = frappe.get_doc({
+        "doctype": "Purchase Invoice",
+        "company": chain.company,
+        "supplier_name": sq_doc.supplier_name,
+        "creation": frappe.utils.now_datetime(),
+        "items": [{"item_code": row.item_code, "qty": row.qty, "rate": row.rate} for row in sq_doc.items],
+    })
+    material_request_doc = frappe.get_doc("Material Request", chain.material_request)
+    company_doc = frappe.get_doc("Company", chain.company)
+
+    # Submitted copy of the Quotation for the Sales Order mapper
+    submitted_quotation = frappe.copy_doc(quotation_doc)
+    submitted_quotation.custom_approved = 1
+    submitted_quotation.insert(ignore_permissions=True)
+    submitted_quotation.submit()
+
+    report_filters = {
+        "company": chain.company,
+        "from_date": quotation_doc.transaction_date,
+        "to_date": quotation_doc.valid_till,
+        "request_for_quotation": chain.request_for_quotation,
+    }
+
+    return {
+        # power_app.quotation
+        "quotation.get_supplier_quotation_items":
+            lambda: quotation.get_supplier_quotation_items(quotation_name),
+        "quotation.get_material_requests_from_quotation":
+            lambda: quotation.get_material_requests_from_quotation(quotation_name),
+        "quotation.add_items_from_supplier_quotations":
+            lambda: quotation.add_items_from_supplier_quotations(quotation_name, selected_items),
+        "quotation.auto_select_supplier_quotation_items":
+            lambda: quotation.auto_select_supplier_quotation_items(quotation_name),
+        "quotation.preview_quotation_rates":
+            lambda: quotation.preview_quotation_rates(preview_items, preview_expenses, margin=10),
+        "quotation.quotation_validate":
+            lambda: quotation.quotation_validate(quotation_doc, "validate"),
+        "quotation.quotation_before_submit":
+            lambda: quotation.quotation_before_submit(approved_quotation, "before_submit"),
+        # power_app.supplier_quotation
+        "supplier_quotation.check_quotation_linked":
+            lambda: supplier_quotation.check_quotation_linked(sq_name),
+        "supplier_quotation.get_expense_template_data":
+            lambda: supplier_quotation.get_expense_template_data(chain.expense_template),
+        "supplier_quotation.get_expense_templates_data":
+            lambda: supplier_quotation.get_expense_templates_data([chain.expense_template]),
+        "supplier_quotation.update_quotation_linked":
+            lambda: supplier_quotation.update_quotation_linked(sq_name, quotation_name),
+        "supplier_quotation.supplier_quotation_validate":
+            lambda: supplier_quotation.supplier_quotation_validate(sq_doc, "validate"),
+        "supplier_quotation.supplier_quotation_before_submit":
+            lambda: supplier_quotation.supplier_quotation_before_submit(sq_doc, "before_submit"),
+        "supplier_quotation.clear_linked_quotation_cache":
+            lambda: supplier_quotation.clear_linked_quotation_cache(sq_doc, "on_update"),
+        # power_app.supplier_offers
+        "supplier_offers.update_supplier_offers":
+            lambda: supplier_offers.update_supplier_offers(sq_doc, "on_submit"),
+        "supplier_offers.update_material_request_offers":
+            lambda: supplier_offers.update_material_request_offers(material_request_doc, "on_update"),
+        # power_app.item
+        "item.get_item_details": lambda: item.get_item_details(chain.item_codes[0]),
+        "item.get_items_details": lambda: item.get_items_details(chain.item_codes),
+        "item.update_item_rate_cache": lambda: submit_item_rates(purchase_invoice_doc),
+        # power_app.material_request
+        "material_request.make_material_request_from_quotation":
+            lambda: material_request.make_material_request_from_quotation(quotation_name),
+        "material_request.insert_material_request":
+            lambda: material_request.insert_material_request(quotation_name),
+        # power_app.quotation_mapper
+        "quotation_mapper.make_sales_order":
+            lambda: quotation_mapper.make_sales_order(submitted_quotation.name),
+        "quotation_mapper.insert_sales_order":
+            lambda: quotation_mapper.insert_sales_order(
+                submitted_quotation.name, submitted_quotation.valid_till),
+        # power_app.sales_order
+        "sales_order.sales_order_validate":
+            lambda: sales_order.sales_order_validate(sales_order_doc, "validate"),
+        # power_app.service_expenses
+        "service_expenses.clear_company_cache":
+            lambda: service_expenses.clear_company_cache(company_doc, "on_update"),
+        # Script report
+        "power_app.report.supplier_quotation_comparison.supplier_quotation_comparison.get_comparison_rows":
+            lambda: supplier_quotation_comparison.get_comparison_rows(frappe._dict(report_filters)),
+        "power_app.report.supplier_quotation_comparison.supplier_quotation_comparison.clear_report_cache":
+            lambda: supplier_quotation_comparison.clear_report_cache(sq_doc, "on_submit"),
+    }
+
+
+def run_cases(chain=None, repeat=REPEAT):
+    """
+    Measure every case
+
+    Returns:
+        dict: {case name: {wall_ms, queries}}
+    """
+    with forbid_commit():
+        chain = chain or make_procurement_chain(**CHAIN_SIZE)
+        return {name: measure(func, repeat) for name, func in get_cases(chain).items()}
+
+
+@contextmanager
+def forbid_commit():
+    """
+    Fail on frappe.db.commit, so benchmark data can always be rolled back
+    """
+    commit = frappe.db.commit
+
+    def failing_commit(*args, **kwargs):
+        raise AssertionError("A benchmark case committed; its data cannot be rolled back")
+
+    frappe.db.commit = failing_commit
+    try:
+        yield
+    finally:
+        frappe.db.commit = commit
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+
+    with open(BASELINE_PATH) as f:
+        return json.load(f).get("cases") or {}
+
+
+def compare(results, baseline):
+    """
+    Cases that regressed past the thresholds (cases without a baseline are skipped)
+
+    Returns:
+        list: One message per regression
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+
+        wall_limit = expected["wall_ms"] * WALL_TIME_FACTOR + WALL_TIME_SLACK_MS
+        if result["wall_ms"] > wall_limit:
+            regressions.append(
+                f"{name}: {result['wall_ms']:.1f} ms (baseline {expected['wall_ms']:.1f} ms, "
+                f"limit {wall_limit:.1f} ms)"
+            )
+
+        query_limit = int(expected["queries"] * QUERY_COUNT_FACTOR) + QUERY_COUNT_SLACK
+        if result["queries"] > query_limit:
+            regressions.append(
+                f"{name}: {result['queries']} queries (baseline {expected['queries']}, "
+                f"limit {query_limit})"
+            )
+
+    return regressions
+
+
+def get_missing_cases(results, baseline):
+    """
+    Returns:
+        list: Names of cases that have no baseline yet
+    """
+    return [name for name in results if not baseline.get(name)]
+
+
+def print_results(results, baseline):
+    width = max(map(len, results), default=4)
+    print(f"{'case':<{width}} {'wall ms':>10} {'base ms':>10} {'queries':>8} {'base q':>8}")
+    for name, result in results.items():
+        expected = baseline.get(name) or {}
+        print(
+            f"{name:<{width}} {result['wall_ms']:>10.2f} {expected.get('wall_ms', '-'):>10} "
+            f"{result['queries']:>8} {expected.get('queries', '-'):>8}"
+        )
+
+
+def run():
+    """
+    Print timings against the baseline; raises on regressions
+    """
+    try:
+        results = run_cases()
+    finally:
+        frappe.db.rollback()
+
+    baseline = load_baseline()
+    print_results(results, baseline)
+
+    missing = get_missing_cases(results, baseline)
+    if missing:
+        print(f"Not in the baseline (run update_baseline): {', '.join(missing)}")
+
+    regressions = compare(results, baseline)
+    if regressions:
+        raise AssertionError("Benchmark regressions:\n" + "\n".join(regressions))
+
+    return results
+
+
+def update_baseline():
+    """
+    Record the current timings as baseline.json
+    """
+    try:
+        results = run_cases()
+    finally:
+        frappe.db.rollback()
+
+    with open(BASELINE_PATH, "w") as f:
+        json.dump({"chain_size": CHAIN_SIZE, "repeat": REPEAT, "cases": results}, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+    print_results(results, results)
+    return results
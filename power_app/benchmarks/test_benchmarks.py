@@ -0,0 +1,88 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+import inspect
+import pkgutil
+import unittest
+import warnings
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+import power_app
+from power_app import hooks
+from power_app.benchmarks import suite
+from power_app.benchmarks.data import get_benchmark_data_counts, make_procurement_chain
+
+
+def get_expected_cases():
+    """
+    Case names every doc_events handler and @instrument() callable needs
+
+    Returns:
+        set: Dotted paths inside the power_app package
+    """
+    paths = set()
+    for events in hooks.doc_events.values():
+        for handlers in events.values():
+            paths.update([handlers] if isinstance(handlers, str) else handlers)
+
+    for module_info in pkgutil.walk_packages(power_app.__path__, "power_app."):
+        module = frappe.get_module(module_info.name)
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if getattr(func, "instrument_metric", None) and func.__module__ == module.__name__:
+                paths.add(f"{module.__name__}.{name}")
+
+    return {path.removeprefix("power_app.") for path in paths}
+
+
+def skip_without_company():
+    if not frappe.db.get_value("Company", {}):
+        raise unittest.SkipTest("Benchmarks need a site with at least one Company")
+
+
+class TestBenchmarks(FrappeTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        skip_without_company()
+
+        cls.chain = make_procurement_chain(**suite.CHAIN_SIZE)
+
+    @classmethod
+    def tearDownClass(cls):
+        frappe.db.rollback()
+        super().tearDownClass()
+
+    def test_every_hook_and_instrumented_method_has_a_case(self):
+        cases = set(suite.get_cases(self.chain))
+        for case in sorted(get_expected_cases() - suite.NOT_BENCHMARKED):
+            self.assertIn(case, cases, f"No benchmark case for {case}")
+
+    def test_no_regressions_against_baseline(self):
+        results = suite.run_cases(self.chain)
+        baseline = suite.load_baseline()
+        missing = suite.get_missing_cases(results, baseline)
+        if missing:
+            warnings.warn(f"Benchmark cases without a baseline: {', '.join(missing)}")
+
+        regressions = suite.compare(results, baseline)
+
+        self.assertFalse(regressions, "Benchmark regressions:\n" + "\n".join(regressions))
+
+
+class TestBenchmarkRollback(FrappeTestCase):
+    def test_run_leaves_no_data(self):
+        skip_without_company()
+
+        frappe.db.rollback()
+        before = get_benchmark_data_counts()
+        try:
+            suite.run()
+        except AssertionError as e:
+            # Regressions are checked by TestBenchmarks, committing cases are not
+            if "committed" in str(e):
+                raise
+
+        frappe.db.rollback()
+        self.assertEqual(get_benchmark_data_counts(), before)
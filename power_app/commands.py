@@ -0,0 +1,54 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Bench commands for Power App
+"""
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-item-rate-cache")
+@pass_context
+def rebuild_item_rate_cache(context):
+    """
+    Rebuild the last purchase / selling rate cache from invoice history
+    """
+    import frappe
+    from power_app.item import rebuild_item_rate_cache
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        count = rebuild_item_rate_cache()
+        click.echo(f"Item rate cache rebuilt for {count} items")
+    finally:
+        frappe.destroy()
+
+
+@click.command("rebuild-supplier-offers")
+@pass_context
+def rebuild_supplier_offers(context):
+    """
+    Rebuild the Supplier Offer table from submitted Supplier Quotations
+    """
+    import frappe
+    from power_app.supplier_offers import rebuild_supplier_offers
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        count = rebuild_supplier_offers()
+        frappe.db.commit()
+        click.echo(f"Supplier Offer table rebuilt with {count} rows")
+    finally:
+        frappe.destroy()
+
+
+commands = [
+    rebuild_item_rate_cache,
+    rebuild_supplier_offers,
+]
@@ -0,0 +1,167 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Expense allocation engine for Quotation items
+
+Works on plain arrays (one value per item row) so it can be shared by
+quotation_validate and any other caller that needs the same rates:
+1. Restore original rates (supplier quotation rate > price list rate > current rate)
+2. Distribute total expenses by item amount (rate * qty) with largest-remainder
+   rounding, so the rounded item expense amounts always sum to the total
+3. Apply margin on (original rate + distributed expense per unit)
+
+Quotations with many rows use NumPy when it is installed; the pure Python
+path follows the same steps for small quotations and when NumPy is missing,
+and both give the same results. The total is rounded with flt, like every
+other amount in the app.
+"""
+
+import heapq
+import math
+
+from frappe.utils import flt
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# Below this row count the pure Python path is faster than converting to arrays
+NUMPY_MIN_ROWS = 500
+
+
+def calculate_item_rates(supplier_rates, price_list_rates, rates, qtys,
+                         total_expenses, margin=0, precision=2):
+    """
+    Calculate final item rates and item expense amounts
+
+    Args:
+        supplier_rates: custom_supplier_quotation_item_rate per row
+        price_list_rates: price_list_rate per row
+        rates: current rate per row (fallback original rate)
+        qtys: qty per row
+        total_expenses: Sum of the expense table amounts
+        margin: Margin percentage applied after expenses
+        precision: Decimal places of custom_item_expense_amount
+
+    Returns:
+        tuple: (rates, expense_amounts) as lists of floats
+    """
+    if _use_numpy(len(rates)):
+        return _calculate_item_rates_numpy(
+            supplier_rates, price_list_rates, rates, qtys, total_expenses, margin, precision
+        )
+
+    base_rates = restore_rates(supplier_rates, price_list_rates, rates)
+    amounts = [rate * qty for rate, qty in zip(base_rates, qtys)]
+    total_item_amount = sum(amounts)
+
+    if total_item_amount != 0 and total_expenses > 0:
+        expense_amounts = allocate_largest_remainder(amounts, total_expenses, precision)
+    else:
+        expense_amounts = [0.0] * len(base_rates)
+
+    final_rates = []
+    for rate, qty, expense_amount in zip(base_rates, qtys, expense_amounts):
+        if qty:
+            rate += expense_amount / qty
+        if margin:
+            rate += rate * margin / 100
+        final_rates.append(rate)
+
+    return final_rates, expense_amounts
+
+
+def restore_rates(supplier_rates, price_list_rates, rates):
+    """
+    Original rate per row
+    Priority: supplier quotation item rate > price list rate > current rate
+    """
+    return [
+        supplier_rate if supplier_rate > 0
+        else price_list_rate if price_list_rate > 0
+        else rate
+        for supplier_rate, price_list_rate, rate in zip(supplier_rates, price_list_rates, rates)
+    ]
+
+
+def allocate_largest_remainder(weights, total, precision=2):
+    """
+    Split total proportionally to weights, rounded to precision
+
+    Every share is floored to the smallest currency unit and the remaining
+    units go to the rows with the largest fractional parts (ties go to the
+    earlier row), so the shares sum exactly to the rounded total.
+    """
+    if _use_numpy(len(weights)):
+        return _allocate_largest_remainder_numpy(weights, total, precision).tolist()
+
+    scale = 10 ** precision
+    total_units = _get_total_units(total, precision)
+
+    factor = total_units / math.fsum(weights)
+    raw = [weight * factor for weight in weights]
+    units = list(map(math.floor, raw))
+
+    shortfall = total_units - sum(units)
+    if shortfall > 0:
+        remainders = [value - unit for value, unit in zip(raw, units)]
+        for i in heapq.nlargest(shortfall, range(len(raw)), key=remainders.__getitem__):
+            units[i] += 1
+
+    return [unit / scale for unit in units]
+
+
+def _use_numpy(row_count):
+    return np is not None and row_count >= NUMPY_MIN_ROWS
+
+
+def _get_total_units(total, precision):
+    # flt rounds an exact half unit up (0.005 at precision 2 is one unit);
+    # the outer round only removes float noise from the scaled value
+    return int(round(flt(total, precision) * 10 ** precision))
+
+
+def _calculate_item_rates_numpy(supplier_rates, price_list_rates, rates, qtys,
+                                total_expenses, margin, precision):
+    supplier_rates = np.asarray(supplier_rates, dtype=float)
+    price_list_rates = np.asarray(price_list_rates, dtype=float)
+    qtys = np.asarray(qtys, dtype=float)
+
+    base_rates = np.where(
+        supplier_rates > 0,
+        supplier_rates,
+        np.where(price_list_rates > 0, price_list_rates, np.asarray(rates, dtype=float)),
+    )
+    amounts = base_rates * qtys
+    total_item_amount = amounts.sum()
+
+    if total_item_amount != 0 and total_expenses > 0:
+        expense_amounts = _allocate_largest_remainder_numpy(amounts, total_expenses, precision)
+    else:
+        expense_amounts = np.zeros(len(base_rates))
+
+    safe_qtys = np.where(qtys != 0, qtys, 1)
+    final_rates = base_rates + np.where(qtys != 0, expense_amounts / safe_qtys, 0)
+    if margin:
+        final_rates = final_rates + final_rates * margin / 100
+
+    return final_rates.tolist(), expense_amounts.tolist()
+
+
+def _allocate_largest_remainder_numpy(weights, total, precision):
+    weights = np.asarray(weights, dtype=float)
+    scale = 10 ** precision
+    total_units = _get_total_units(total, precision)
+
+    # fsum like the Python path; ndarray.sum() adds in a different order
+    raw = weights * (total_units / math.fsum(weights))
+    units = np.floor(raw)
+
+    shortfall = int(total_units - units.sum())
+    if shortfall > 0:
+        by_remainder = np.argsort(-(raw - units), kind="stable")
+        units[by_remainder[:shortfall]] += 1
+
+    return units / scale
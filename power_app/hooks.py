@@ -48,7 +48,9 @@ doctype_js = {
     "Supplier Quotation": "public/js/supplier_quotation.js",
     "Sales Order": "public/js/sales_order.js",
 }
-# doctype_list_js = {"doctype" : "public/js/doctype_list.js"}
+doctype_list_js = {
+    "Quotation": "public/js/quotation_list.js",
+}
 # doctype_tree_js = {"doctype" : "public/js/doctype_tree.js"}
 # doctype_calendar_js = {"doctype" : "public/js/doctype_calendar.js"}
 
@@ -95,6 +97,12 @@ doctype_js = {
 # before_uninstall = "power_app.uninstall.before_uninstall"
 # after_uninstall = "power_app.uninstall.after_uninstall"
 
+# Migration
+# ---------
+
+# Add missing indexes for power_app's lookup columns (power_app.indexes)
+after_migrate = "power_app.indexes.after_migrate"
+
 # Integration Setup
 # ------------------
 # To set up dependencies/integrations with other apps
@@ -157,10 +165,44 @@ doc_events = {
         # "on_trash": "method"
     },
     "Supplier Quotation": {
+        "validate": "power_app.supplier_quotation.supplier_quotation_validate",
         "before_submit": "power_app.supplier_quotation.supplier_quotation_before_submit",
-        # "on_cancel": "method",
-        # "on_trash": "method"
-    }
+        "on_update": "power_app.supplier_quotation.clear_linked_quotation_cache",
+        # Drop cached Supplier_Quotation_Comparison report results and
+        # keep Supplier Offer rows (power_app.supplier_offers) up to date
+        "on_submit": [
+            "power_app.power_app.report.supplier_quotation_comparison.supplier_quotation_comparison.clear_report_cache",
+            "power_app.supplier_offers.update_supplier_offers",
+        ],
+        "on_cancel": [
+            "power_app.supplier_quotation.clear_linked_quotation_cache",
+            "power_app.power_app.report.supplier_quotation_comparison.supplier_quotation_comparison.clear_report_cache",
+            "power_app.supplier_offers.update_supplier_offers",
+        ],
+        "on_trash": "power_app.supplier_quotation.clear_linked_quotation_cache",
+    },
+    # Supplier Offer rows and cached Supplier_Quotation_Comparison results
+    # follow the Material Request's customer Quotation
+    "Material Request": {
+        "on_update": [
+            "power_app.supplier_offers.update_material_request_offers",
+            "power_app.power_app.report.supplier_quotation_comparison.supplier_quotation_comparison.clear_report_cache",
+        ],
+    },
+    # Drop cached service expense accounts (power_app.service_expenses)
+    "Company": {
+        "on_update": "power_app.service_expenses.clear_company_cache",
+        "on_trash": "power_app.service_expenses.clear_company_cache",
+    },
+    # Keep the last purchase / selling rate cache (power_app.item) up to date
+    "Purchase Invoice": {
+        "on_submit": "power_app.item.update_item_rate_cache",
+        "on_cancel": "power_app.item.update_item_rate_cache",
+    },
+    "Sales Invoice": {
+        "on_submit": "power_app.item.update_item_rate_cache",
+        "on_cancel": "power_app.item.update_item_rate_cache",
+    },
 }
 
 # Scheduled Tasks
@@ -0,0 +1,178 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Database indexes for power_app's custom lookup columns
+
+The Quotation → Material Request → Supplier Quotation chain is linked
+through custom fields that Frappe does not index, so these lookups scan
+whole tables once the tables grow. ensure_indexes adds the composite
+indexes they need. It runs from the after_migrate hook and only adds
+indexes that are missing.
+
+explain_queries runs EXPLAIN on one probe per lookup (same tables and
+conditions as the real queries). The "Power App Index Check" report shows
+the plans. On MariaDB a probe does a full scan when the access type is ALL.
+Note that MariaDB may still choose a full scan on very small tables even
+when a usable index exists (possible_keys is set).
+"""
+
+import frappe
+
+INDEX_PREFIX = "power_app_"
+
+# (DocType, columns) in index column order
+MANAGED_INDEXES = (
+    # quotation.get_material_requests_from_quotation,
+    # material_request.create_material_requests_for_quotations
+    ("Material Request", ("custom_quotation_refrence", "docstatus")),
+    # quotation.get_material_requests_from_quotation, power_app.supplier_offers
+    ("Supplier Quotation Item", ("material_request", "docstatus")),
+    # quotation.get_material_requests_from_quotation (RFQ count)
+    ("Request for Quotation Item", ("material_request",)),
+    # quotation.get_supplier_quotation_items
+    ("Supplier Offer", ("quotation", "item_code", "rate")),
+    # Quotations built from a Supplier Quotation
+    ("Quotation Item", ("custom_supplier_quotation",)),
+    # item.get_item_details / get_items_details, item.rebuild_item_rate_cache
+    ("Purchase Invoice Item", ("item_code", "docstatus", "creation")),
+    ("Sales Invoice Item", ("item_code", "docstatus", "creation")),
+)
+
+# {probe name: SQL}; values are placeholders, only the plan matters
+PROBE_QUERIES = {
+    "quotation.get_supplier_quotation_items": """
+        select supplier_quotation_item, item_code, rate
+        from `tabSupplier Offer`
+        where quotation = %(value)s
+        order by item_code, rate
+    """,
+    "supplier_offers.update_material_request_offers": """
+        select sq_item.name
+        from `tabSupplier Quotation Item` sq_item
+        inner join `tabSupplier Quotation` sq on sq.name = sq_item.parent
+        inner join `tabMaterial Request` mr on mr.name = sq_item.material_request
+        where sq_item.material_request = %(value)s and sq.docstatus = 1
+    """,
+    "quotation.get_material_requests_from_quotation": """
+        select name from `tabMaterial Request`
+        where custom_quotation_refrence = %(value)s
+    """,
+    "quotation.get_material_requests_from_quotation (RFQ count)": """
+        select material_request, count(distinct parent)
+        from `tabRequest for Quotation Item`
+        where material_request in %(values)s
+        group by material_request
+    """,
+    "quotation.get_material_requests_from_quotation (SQ count)": """
+        select material_request, count(distinct parent)
+        from `tabSupplier Quotation Item`
+        where material_request in %(values)s and docstatus = 1
+        group by material_request
+    """,
+    "material_request.create_material_requests_for_quotations": """
+        select custom_quotation_refrence from `tabMaterial Request`
+        where custom_quotation_refrence in %(values)s and docstatus < 2
+    """,
+    "Quotation Item by Supplier Quotation": """
+        select parent from `tabQuotation Item`
+        where custom_supplier_quotation = %(value)s
+    """,
+    "item.get_items_details (last purchase rate)": """
+        select item_code, rate, parent, creation
+        from `tabPurchase Invoice Item`
+        where item_code in %(values)s and parenttype = 'Purchase Invoice' and docstatus = 1
+        order by item_code, creation desc
+    """,
+    "item.get_items_details (last selling rate)": """
+        select item_code, rate, creation
+        from `tabSales Invoice Item`
+        where item_code in %(values)s and parenttype = 'Sales Invoice' and docstatus = 1
+        order by item_code, creation desc
+    """,
+}
+
+PROBE_VALUES = {"value": "", "values": ("",)}
+
+
+def after_migrate():
+    """
+    after_migrate hook: add missing indexes, then warn about probes that still scan
+    """
+    for doctype, columns in ensure_indexes():
+        print(f"power_app: added index on {doctype} ({', '.join(columns)})")
+
+    for row in explain_queries():
+        if row.full_scan:
+            print(f"power_app: {row.query} does a full scan of {row.table}")
+
+
+def get_index_name(columns):
+    return INDEX_PREFIX + "_".join(columns)
+
+
+def get_missing_indexes():
+    """
+    Managed indexes not on the database yet
+
+    DocTypes or columns that do not exist on this site (e.g. custom fields
+    not synced yet) are left out.
+
+    Returns:
+        list: [(doctype, columns)]
+    """
+    missing = []
+    for doctype, columns in MANAGED_INDEXES:
+        if not frappe.db.table_exists(doctype):
+            continue
+        if not all(frappe.db.has_column(doctype, column) for column in columns):
+            continue
+        if not frappe.db.has_index(f"tab{doctype}", get_index_name(columns)):
+            missing.append((doctype, columns))
+
+    return missing
+
+
+def ensure_indexes():
+    """
+    Add the managed indexes that are missing
+
+    Returns:
+        list: [(doctype, columns)] indexes added
+    """
+    missing = get_missing_indexes()
+    for doctype, columns in missing:
+        frappe.db.add_index(doctype, list(columns), index_name=get_index_name(columns))
+
+    return missing
+
+
+def explain_queries():
+    """
+    EXPLAIN every probe query (MariaDB only)
+
+    Returns:
+        list: frappe._dict per probe and table: query, table, access_type,
+            possible_keys, key, rows, extra, full_scan
+    """
+    if frappe.db.db_type != "mariadb":
+        return []
+
+    plans = []
+    for query, sql in PROBE_QUERIES.items():
+        for row in frappe.db.sql(f"explain {sql}", PROBE_VALUES, as_dict=True):
+            # Derived and temporary tables (<derived2>, <subquery3>) are not base tables
+            if not row.table or row.table.startswith("<"):
+                continue
+            plans.append(frappe._dict(
+                query=query,
+                table=row.table,
+                access_type=row.type,
+                possible_keys=row.possible_keys,
+                key=row.key,
+                rows=row.rows,
+                extra=row.Extra,
+                full_scan=row.type == "ALL",
+            ))
+
+    return plans
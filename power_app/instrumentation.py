@@ -0,0 +1,234 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Per-call instrumentation for power_app whitelisted methods and doc_events handlers
+
+Functions decorated with @instrument() record, for a sample of calls:
+wall time, SQL query count, SQL time, rows returned by SQL and the size of
+the JSON payload returned. Samples are kept in one capped Redis list per
+method and summarised as percentiles by get_instrumentation_stats
+(desk page: /app/power-app-stats).
+
+Sampling is off unless the site config sets a rate between 0 and 1:
+    bench --site [site] set-config power_app_instrumentation_sample_rate 0.1
+With sampling off a call only costs one site config lookup.
+"""
+
+import functools
+import inspect
+import json
+import random
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+SAMPLE_RATE_CONF_KEY = "power_app_instrumentation_sample_rate"
+METRICS_CACHE_KEY = "power_app:instrumentation:metrics"
+SAMPLES_CACHE_KEY = "power_app:instrumentation:samples:{0}"
+# Rolling window per method
+MAX_SAMPLES = 1000
+
+SAMPLE_FIELDS = ("wall_ms", "queries", "sql_ms", "rows", "payload_bytes")
+
+
+def instrument(name=None):
+    """
+    Decorator: record sampled call metrics under name (default: module.function)
+
+    Put it below @frappe.whitelist() so the whitelisted function is the wrapper:
+
+        @frappe.whitelist()
+        @instrument()
+        def get_items_details(item_codes):
+            ...
+    """
+    def decorator(func):
+        metric = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            sample_rate = frappe.conf.get(SAMPLE_RATE_CONF_KEY)
+            if not sample_rate or random.random() >= flt(sample_rate):
+                return func(*args, **kwargs)
+
+            return _call_sampled(metric, func, args, kwargs)
+
+        # Lets the benchmark suite find every instrumented callable
+        wrapper.instrument_metric = metric
+
+        # frappe.call passes only the arguments the function accepts
+        parameters = inspect.signature(func).parameters.values()
+        if not any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters):
+            wrapper.fnargs = [
+                p.name for p in parameters if p.kind != inspect.Parameter.VAR_POSITIONAL
+            ]
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def track_queries():
+    """
+    Count frappe.db.sql calls, their time and returned rows
+    (query builder, get_all and get_value included)
+
+    Yields:
+        frappe._dict: queries, sql_ms, rows (filled while the block runs)
+    """
+    stats = frappe._dict(queries=0, sql_ms=0.0, rows=0)
+    sql = frappe.db.sql
+
+    def tracking_sql(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = sql(*args, **kwargs)
+        finally:
+            stats.queries += 1
+            stats.sql_ms += (time.perf_counter() - start) * 1000
+        if isinstance(result, (list, tuple)):
+            stats.rows += len(result)
+        return result
+
+    frappe.db.sql = tracking_sql
+    try:
+        yield stats
+    finally:
+        frappe.db.sql = sql
+
+
+def _call_sampled(metric, func, args, kwargs):
+    failed = True
+    result = None
+    with track_queries() as stats:
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+        finally:
+            wall_ms = (time.perf_counter() - start) * 1000
+            record_sample(metric, {
+                "wall_ms": round(wall_ms, 3),
+                "queries": stats.queries,
+                "sql_ms": round(stats.sql_ms, 3),
+                "rows": stats.rows,
+                "payload_bytes": _get_payload_size(result),
+                "failed": int(failed),
+            })
+
+    return result
+
+
+def _get_payload_size(result):
+    if result is None:
+        return 0
+    try:
+        return len(frappe.as_json(result, indent=None))
+    except Exception:
+        return 0
+
+
+def record_sample(metric, sample):
+    """
+    Push one sample to the rolling window of a method
+    """
+    key = SAMPLES_CACHE_KEY.format(metric)
+    try:
+        frappe.cache.sadd(METRICS_CACHE_KEY, metric)
+        frappe.cache.lpush(key, json.dumps(sample))
+        frappe.cache.ltrim(key, 0, MAX_SAMPLES - 1)
+    except Exception:
+        # Instrumentation must never break the instrumented call
+        pass
+
+
+def get_samples(metric):
+    return [
+        json.loads(value)
+        for value in frappe.cache.lrange(SAMPLES_CACHE_KEY.format(metric), 0, MAX_SAMPLES - 1)
+    ]
+
+
+def get_metrics():
+    return sorted(
+        metric.decode() if isinstance(metric, bytes) else metric
+        for metric in frappe.cache.smembers(METRICS_CACHE_KEY)
+    )
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of values (0 for no values)
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    rank = max(int(-(-percent * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+def summarize(samples):
+    """
+    Percentiles of wall time / SQL time and averages of the other fields
+
+    Returns:
+        dict: {calls, failed, wall_ms_p50, wall_ms_p90, wall_ms_p99, sql_ms_p50, sql_ms_p90,
+            queries_p50, queries_max, rows_avg, payload_bytes_avg}
+    """
+    calls = len(samples)
+    columns = {field: [sample.get(field) or 0 for sample in samples] for field in SAMPLE_FIELDS}
+
+    return {
+        "calls": calls,
+        "failed": sum(sample.get("failed") or 0 for sample in samples),
+        "wall_ms_p50": percentile(columns["wall_ms"], 50),
+        "wall_ms_p90": percentile(columns["wall_ms"], 90),
+        "wall_ms_p99": percentile(columns["wall_ms"], 99),
+        "sql_ms_p50": percentile(columns["sql_ms"], 50),
+        "sql_ms_p90": percentile(columns["sql_ms"], 90),
+        "queries_p50": percentile(columns["queries"], 50),
+        "queries_max": max(columns["queries"], default=0),
+        "rows_avg": round(sum(columns["rows"]) / calls, 1) if calls else 0,
+        "payload_bytes_avg": round(sum(columns["payload_bytes"]) / calls) if calls else 0,
+    }
+
+
+@frappe.whitelist()
+def get_instrumentation_stats(metric=None):
+    """
+    Rolling percentiles per instrumented method (System Manager only)
+
+    Returns:
+        dict: {sample_rate, metrics: [{metric, calls, wall_ms_p50, ...}]}
+            slowest (wall_ms_p90) first
+    """
+    frappe.only_for("System Manager")
+
+    metrics = [metric] if metric else get_metrics()
+    stats = [{"metric": name, **summarize(get_samples(name))} for name in metrics]
+    stats.sort(key=lambda row: row["wall_ms_p90"], reverse=True)
+
+    return {
+        "sample_rate": flt(frappe.conf.get(SAMPLE_RATE_CONF_KEY)),
+        "max_samples": MAX_SAMPLES,
+        "metrics": stats,
+    }
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_instrumentation_stats():
+    """
+    Drop all recorded samples (System Manager only)
+    """
+    frappe.only_for("System Manager")
+
+    for metric in get_metrics():
+        frappe.cache.delete_value(SAMPLES_CACHE_KEY.format(metric))
+    frappe.cache.delete_value(METRICS_CACHE_KEY)
+
+    frappe.msgprint(_("Instrumentation samples cleared"), alert=True)
@@ -1,8 +1,17 @@
+import json
+import pickle
+
 import frappe
 from frappe import _
+from frappe.utils import flt, get_datetime
+
+from power_app.instrumentation import instrument
+
+ITEM_RATE_CACHE_KEY = "power_app:item_last_rates"
 
 
 @frappe.whitelist()
+@instrument()
 def get_item_details(item_code):
     """
     Get item details including stock quantity, last selling rate, last purchase rate, and supplier
@@ -16,91 +25,286 @@ def get_item_details(item_code):
             supplier: supplier_name
         }
     """
-    stock_qty = 0.00
-    last_purchase_rate = 0.00
-    supplier = ""
-    last_selling_rate = 0.00
+    details = get_items_details([item_code]) if item_code else {}
+    return details.get(item_code) or _get_empty_item_details(item_code)
+
+
+@frappe.whitelist()
+@instrument()
+def get_items_details(item_codes):
+    """
+    Batch version of get_item_details for the "Show Item History" dialog
+
+    Runs one Bin query for all items; last purchase/selling rates are served
+    from the item rate cache (see get_cached_item_rates).
+
+    Args:
+        item_codes: List (or JSON list) of item codes
+
+    Returns:
+        dict: {item_code: <get_item_details result>}
+    """
+    if isinstance(item_codes, str):
+        item_codes = json.loads(item_codes)
+
+    # Keep request order, drop blanks and duplicates
+    item_codes = list(dict.fromkeys(code for code in item_codes or [] if code))
+    if not item_codes:
+        return {}
+
+    details = {code: _get_empty_item_details(code) for code in item_codes}
 
     try:
-        # Get stock quantity from Bin
-        last_bin_list = frappe.db.get_all(
-            "Bin",
-            filters={
-                "item_code": item_code,
-            },
-            fields=[
-                "name",
-                "warehouse",
-                "actual_qty",
-                "projected_qty",
-                "modified"
-            ],
-            order_by="modified desc",
-            limit=1
+        # Get stock quantity from the most recently modified Bin of each item
+        for row in _get_latest_bins(item_codes):
+            details[row.item_code]["stock_qty"] = row.actual_qty
+    except Exception:
+        frappe.throw(
+            _("Failed to fetch Bin data from the server."),
+            title=_("Database Error")
         )
 
-        if last_bin_list:
-            stock_qty = last_bin_list[0].actual_qty
-    except Exception as e:
-        frappe.throw(
-            frappe._("Failed to fetch Bin data from the server."),
-            title=frappe._("Database Error")
+    # Last purchase / selling rates come from the per-item rate cache
+    for item_code, rates in get_cached_item_rates(item_codes).items():
+        details[item_code]["last_purchase_rate"] = rates["last_purchase_rate"]
+        details[item_code]["supplier"] = rates["supplier"] or ""
+        details[item_code]["last_selling_rate"] = rates["last_selling_rate"]
+
+    return details
+
+
+def get_cached_item_rates(item_codes):
+    """
+    Get last purchase rate, supplier and last selling rate per item from Redis
+
+    Items missing from the cache are loaded from the invoice tables in one
+    batch and stored. Entries are kept up to date by update_item_rate_cache
+    (Purchase Invoice / Sales Invoice on_submit and on_cancel).
+
+    Returns:
+        dict: {item_code: {last_purchase_rate, supplier, last_selling_rate, ...}}
+    """
+    rates = {}
+    missing = []
+    for item_code, entry in _get_cached_entries(item_codes).items():
+        if entry is None:
+            missing.append(item_code)
+        else:
+            rates[item_code] = entry
+
+    if missing:
+        for item_code, entry in _load_item_rates(missing).items():
+            frappe.cache.hset(ITEM_RATE_CACHE_KEY, item_code, entry)
+            rates[item_code] = entry
+
+    return rates
+
+
+def _get_cached_entries(item_codes):
+    """
+    Read cached rate entries for many items with one HMGET
+
+    frappe.cache.hget costs a round trip per item, so the hash is read
+    directly and the values are unpickled the way hget does.
+
+    Returns:
+        dict: {item_code: entry or None}
+    """
+    item_codes = list(dict.fromkeys(item_codes))
+    if not item_codes:
+        return {}
+
+    values = frappe.cache.hmget(frappe.cache.make_key(ITEM_RATE_CACHE_KEY), item_codes)
+    return {
+        item_code: pickle.loads(value) if value is not None else None
+        for item_code, value in zip(item_codes, values)
+    }
+
+
+@instrument()
+def update_item_rate_cache(doc, method):
+    """
+    Document event handler for Purchase Invoice / Sales Invoice on_submit and on_cancel
+
+    on_submit: write the invoice rates through to cached items (if it is the latest invoice)
+    on_cancel: drop cached items so they are reloaded from history on next lookup
+    Cache is only touched after the transaction commits.
+    """
+    item_rates = get_invoice_item_rates(doc)
+    if not item_rates:
+        return
+
+    if method == "on_cancel":
+        frappe.db.after_commit.add(
+            lambda: frappe.cache.hdel(ITEM_RATE_CACHE_KEY, list(item_rates))
         )
+        return
+
+    frappe.db.after_commit.add(lambda: write_item_rates_through(doc, item_rates))
+
+
+def get_invoice_item_rates(doc):
+    """
+    Rate per item code on an invoice
+
+    Returns:
+        dict: {item_code: rate}
+    """
+    # Last row wins when the same item appears on several lines
+    item_rates = {}
+    for row in doc.get("items"):
+        if row.item_code:
+            item_rates[row.item_code] = flt(row.rate)
+
+    return item_rates
+
+
+def write_item_rates_through(doc, item_rates):
+    """
+    Write submitted invoice rates into the cached entries of its items
+
+    Items not cached yet are skipped (they are loaded lazily) and so are
+    entries that already hold a newer invoice.
+    """
+    if doc.doctype == "Purchase Invoice":
+        rate_field, creation_field = "last_purchase_rate", "purchase_creation"
+    else:
+        rate_field, creation_field = "last_selling_rate", "selling_creation"
+
+    creation = get_datetime(doc.creation)
+    supplier = doc.get("supplier_name") or ""
+
+    entries = _get_cached_entries(item_rates)
+    for item_code, rate in item_rates.items():
+        entry = entries[item_code]
+        if entry is None:
+            # Not cached yet, will be loaded lazily
+            continue
+        if entry.get(creation_field) and get_datetime(entry[creation_field]) > creation:
+            # A newer invoice is already cached
+            continue
+
+        entry[rate_field] = rate
+        entry[creation_field] = creation
+        if doc.doctype == "Purchase Invoice":
+            entry["supplier"] = supplier
+        frappe.cache.hset(ITEM_RATE_CACHE_KEY, item_code, entry)
+
+
+def rebuild_item_rate_cache(chunk_size=500):
+    """
+    Rebuild the item rate cache from invoice history
+
+    Run with: bench --site [site] rebuild-item-rate-cache
+    """
+    frappe.cache.delete_key(ITEM_RATE_CACHE_KEY)
+
+    item_codes = frappe.get_all("Item", pluck="name", order_by="name")
+    for start in range(0, len(item_codes), chunk_size):
+        chunk = item_codes[start:start + chunk_size]
+        for item_code, entry in _load_item_rates(chunk).items():
+            frappe.cache.hset(ITEM_RATE_CACHE_KEY, item_code, entry)
+
+    return len(item_codes)
+
+
+def _load_item_rates(item_codes):
+    rates = {
+        item_code: {
+            "last_purchase_rate": 0.00,
+            "supplier": "",
+            "purchase_creation": None,
+            "last_selling_rate": 0.00,
+            "selling_creation": None,
+        }
+        for item_code in item_codes
+    }
 
     try:
-        # Get last purchase rate from Purchase Invoice
-        last_invoice_data = frappe.db.get_all(
-            "Purchase Invoice Item",
-            filters={
-                "item_code": item_code,
-                "parenttype": "Purchase Invoice",
-                "docstatus": 1
-            },
-            fields=["rate", "parent"],
-            order_by="creation desc",
-            limit=1
-        )
-        if not last_invoice_data:
-            last_purchase_rate = 0.00
-            supplier = ""
-        else:
-            last_purchase_rate = last_invoice_data[0].get(
-                "rate") if last_invoice_data else 0.0
-            supplier = frappe.db.get_value(
-                "Purchase Invoice", last_invoice_data[0].get(
-                    "parent"), "supplier_name"
-            )
-
-    except Exception as e:
+        # Get last purchase rate and supplier from Purchase Invoice
+        for row in _get_last_purchase_rows(item_codes):
+            rates[row.item_code]["last_purchase_rate"] = row.rate
+            rates[row.item_code]["supplier"] = row.supplier_name or ""
+            rates[row.item_code]["purchase_creation"] = row.creation
+    except Exception:
         frappe.throw(
-            frappe._("Failed to retrieve last purchase details from the server."),
-            title=frappe._("Database Error")
+            _("Failed to retrieve last purchase details from the server."),
+            title=_("Database Error")
         )
 
     try:
         # Get last selling rate from Sales Invoice
-        last_sales_invoice_data = frappe.db.get_all(
-            "Sales Invoice Item",
-            filters={
-                "item_code": item_code,
-                "parenttype": "Sales Invoice",
-                "docstatus": 1
-            },
-            fields=["rate", "parent"],
-            order_by="creation desc",
-            limit=1
-        )
-        if last_sales_invoice_data:
-            last_selling_rate = last_sales_invoice_data[0].get(
-                "rate") if last_sales_invoice_data else 0.0
-    except Exception as e:
+        for row in _get_last_selling_rows(item_codes):
+            rates[row.item_code]["last_selling_rate"] = row.rate
+            rates[row.item_code]["selling_creation"] = row.creation
+    except Exception:
         # Don't throw error for selling rate
-        last_selling_rate = 0.00
+        pass
+
+    return rates
 
+
+def _get_empty_item_details(item_code):
     return {
         "item_code": item_code,
-        "stock_qty": stock_qty,
-        "last_selling_rate": last_selling_rate,
-        "last_purchase_rate": last_purchase_rate,
-        "supplier": supplier or ""
+        "stock_qty": 0.00,
+        "last_selling_rate": 0.00,
+        "last_purchase_rate": 0.00,
+        "supplier": ""
     }
+
+
+def _get_latest_bins(item_codes):
+    return frappe.db.sql(
+        """
+        select item_code, actual_qty
+        from (
+            select item_code, actual_qty,
+                row_number() over (partition by item_code order by modified desc) as row_no
+            from `tabBin`
+            where item_code in %(item_codes)s
+        ) latest
+        where row_no = 1
+        """,
+        {"item_codes": tuple(item_codes)},
+        as_dict=True,
+    )
+
+
+def _get_last_purchase_rows(item_codes):
+    return frappe.db.sql(
+        """
+        select latest.item_code, latest.rate, latest.creation, pi.supplier_name
+        from (
+            select item_code, rate, parent, creation,
+                row_number() over (partition by item_code order by creation desc) as row_no
+            from `tabPurchase Invoice Item`
+            where item_code in %(item_codes)s
+                and parenttype = 'Purchase Invoice'
+                and docstatus = 1
+        ) latest
+        left join `tabPurchase Invoice` pi on pi.name = latest.parent
+        where latest.row_no = 1
+        """,
+        {"item_codes": tuple(item_codes)},
+        as_dict=True,
+    )
+
+
+def _get_last_selling_rows(item_codes):
+    return frappe.db.sql(
+        """
+        select item_code, rate, creation
+        from (
+            select item_code, rate, creation,
+                row_number() over (partition by item_code order by creation desc) as row_no
+            from `tabSales Invoice Item`
+            where item_code in %(item_codes)s
+                and parenttype = 'Sales Invoice'
+                and docstatus = 1
+        ) latest
+        where row_no = 1
+        """,
+        {"item_codes": tuple(item_codes)},
+        as_dict=True,
+    )
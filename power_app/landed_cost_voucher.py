@@ -10,11 +10,20 @@ in addition to Stock Items and Fixed Assets.
 import frappe
 from frappe import _
 from frappe.query_builder.custom import ConstantColumn
+from frappe.utils import flt
 import erpnext
 from erpnext.stock.doctype.landed_cost_voucher.landed_cost_voucher import (
     LandedCostVoucher as OriginalLandedCostVoucher,
 )
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# Below this row count the per-row loop is faster than converting to arrays
+NUMPY_MIN_ROWS = 500
+
 
 class LandedCostVoucher(OriginalLandedCostVoucher):
     """
@@ -25,71 +34,167 @@ class LandedCostVoucher(OriginalLandedCostVoucher):
     - make_gl_entries() will handle service items correctly (safe)
     """
 
+    def set_applicable_charges_on_item(self):
+        """
+        Override to distribute charges with distribute_charges (one array pass)
+        Same results as ERPNext: each row rounded, rounding difference on the last row
+        """
+        if self.get("taxes") and self.distribute_charges_based_on != "Distribute Manually":
+            items = self.get("items")
+            if not items:
+                return
+
+            based_on_field = frappe.scrub(self.distribute_charges_based_on)
+            basis = [flt(item.get(based_on_field)) for item in items]
+
+            if not sum(basis):
+                frappe.throw(
+                    _(
+                        "It's not possible to distribute charges equally when total amount is zero, please set 'Distribute Charges Based On' as 'Quantity'"
+                    )
+                )
+
+            charges = distribute_charges(
+                basis,
+                self.total_taxes_and_charges,
+                items[0].precision("applicable_charges"),
+            )
+            for item, applicable_charges in zip(items, charges):
+                item.applicable_charges = applicable_charges
+
     @frappe.whitelist()
     def get_items_from_purchase_receipts(self):
         """
         Override to include Service Items in addition to Stock Items and Fixed Assets
+        All receipts of the same document type are loaded in one query
         """
         self.set("items", [])
-        for pr in self.get("purchase_receipts"):
-            if pr.receipt_document_type and pr.receipt_document:
-                pr_items = get_pr_items_extended(pr)
-
-                for d in pr_items:
-                    item = self.append("items")
-                    item.item_code = d.item_code
-                    item.description = d.description
-                    item.qty = d.qty
-                    item.rate = d.base_rate
-                    item.cost_center = (
-                        d.cost_center or erpnext.get_default_cost_center(
-                            self.company)
-                    )
-                    item.amount = d.base_amount
-                    item.receipt_document_type = pr.receipt_document_type
-                    item.receipt_document = pr.receipt_document
-                    item.purchase_receipt_item = d.name
-                    item.is_fixed_asset = d.is_fixed_asset
+        receipts = [
+            pr for pr in self.get("purchase_receipts")
+            if pr.receipt_document_type and pr.receipt_document
+        ]
+        if not receipts:
+            return
+
+        # Resolve the default cost center once for all rows
+        default_cost_center = None
+
+        for d in get_pr_items_extended(receipts):
+            if not d.cost_center and not default_cost_center:
+                default_cost_center = erpnext.get_default_cost_center(self.company)
 
+            item = self.append("items")
+            item.item_code = d.item_code
+            item.description = d.description
+            item.qty = d.qty
+            item.rate = d.base_rate
+            item.cost_center = d.cost_center or default_cost_center
+            item.amount = d.base_amount
+            item.receipt_document_type = d.receipt_document_type
+            item.receipt_document = d.receipt_document
+            item.purchase_receipt_item = d.name
+            item.is_fixed_asset = d.is_fixed_asset
 
-def get_pr_items_extended(purchase_receipt):
+
+def get_pr_items_extended(purchase_receipts):
     """
     Extended version of get_pr_items that includes Service Items
     Original: Only Stock Items (is_stock_item == 1) or Fixed Assets (is_fixed_asset == 1)
-    Extended: Includes Service Items (is_stock_item == 0) as well
+    Extended: Includes Service Items (is_stock_item == 0) as well, so the Item
+    join is not needed at all
+
+    Args:
+        purchase_receipts: Landed Cost Purchase Receipt rows (one or a list)
+
+    Returns:
+        Receipt items of all receipts, one query per receipt document type,
+        in receipt order and idx order within each receipt
     """
-    item = frappe.qb.DocType("Item")
-    pr_item = frappe.qb.DocType(
-        purchase_receipt.receipt_document_type + " Item"
-    )
-    return (
-        frappe.qb.from_(pr_item)
-        .inner_join(item)
-        .on(item.name == pr_item.item_code)
-        .select(
-            pr_item.item_code,
-            pr_item.description,
-            pr_item.qty,
-            pr_item.base_rate,
-            pr_item.base_amount,
-            pr_item.name,
-            pr_item.cost_center,
-            pr_item.is_fixed_asset,
-            ConstantColumn(purchase_receipt.receipt_document_type).as_(
-                "receipt_document_type"
-            ),
-            ConstantColumn(purchase_receipt.receipt_document).as_(
-                "receipt_document"
-            ),
-        )
-        .where(
-            (pr_item.parent == purchase_receipt.receipt_document)
-            & (
-                (item.is_stock_item == 1)
-                | (item.is_fixed_asset == 1)
-                | (item.is_stock_item == 0)  # Include Service Items
+    if not isinstance(purchase_receipts, (list, tuple)):
+        purchase_receipts = [purchase_receipts]
+
+    receipt_position = {}
+    receipts_by_type = {}
+    for pr in purchase_receipts:
+        key = (pr.receipt_document_type, pr.receipt_document)
+        if key in receipt_position:
+            continue
+        receipt_position[key] = len(receipt_position)
+        receipts_by_type.setdefault(pr.receipt_document_type, []).append(pr.receipt_document)
+
+    items = []
+    for receipt_document_type, receipt_documents in receipts_by_type.items():
+        pr_item = frappe.qb.DocType(receipt_document_type + " Item")
+        items.extend(
+            frappe.qb.from_(pr_item)
+            .select(
+                pr_item.item_code,
+                pr_item.description,
+                pr_item.qty,
+                pr_item.base_rate,
+                pr_item.base_amount,
+                pr_item.name,
+                pr_item.cost_center,
+                pr_item.is_fixed_asset,
+                pr_item.idx,
+                pr_item.parent.as_("receipt_document"),
+                ConstantColumn(receipt_document_type).as_(
+                    "receipt_document_type"
+                ),
             )
+            .where(pr_item.parent.isin(receipt_documents))
+            .run(as_dict=True)
         )
-        .orderby(pr_item.idx)
-        .run(as_dict=True)
-    )
+
+    items.sort(key=lambda d: (
+        receipt_position[(d.receipt_document_type, d.receipt_document)], d.idx
+    ))
+    return items
+
+
+def distribute_charges(basis, total_charges, precision):
+    """
+    Distribute total_charges proportionally to basis (qty or amount per row)
+
+    Mirrors ERPNext's LandedCostVoucher.set_applicable_charges_on_item:
+    every share is rounded to precision and the difference between the
+    rounded sum and total_charges is added to the last row. Large vouchers
+    are computed with NumPy in one array pass (when NumPy is installed).
+
+    Returns:
+        list: applicable charges per row
+    """
+    total_charges = flt(total_charges)
+    total_basis = sum(basis)
+    factor = total_charges / flt(total_basis)
+
+    if np is not None and len(basis) >= NUMPY_MIN_ROWS:
+        charges = _round_array(np.asarray(basis, dtype=float) * factor, precision)
+    else:
+        charges = [flt(value * factor, precision) for value in basis]
+
+    # Sequential sum, same order of float additions as ERPNext
+    total_distributed = sum(charges)
+    if total_distributed != total_charges:
+        charges[-1] += total_charges - total_distributed
+
+    return charges
+
+
+def _round_array(values, precision):
+    """
+    Round an array the same way flt(value, precision) does
+    NumPy only implements the default (legacy banker's) rounding, other
+    System Settings rounding methods are applied per value through flt
+    """
+    if frappe.get_system_settings("rounding_method") not in (None, "", "Banker's Rounding (legacy)"):
+        return [flt(value, precision) for value in values.tolist()]
+
+    multiplier = 10 ** precision
+    scaled = np.round(values * multiplier, 8)
+    floor = np.floor(scaled)
+    # Exact halves: to the even neighbour at precision 0, up otherwise
+    # (frappe.utils.data._bankers_rounding_legacy), everything else to the nearest
+    halves = floor + floor % 2 if not precision else floor + 1
+    rounded = np.where(scaled - floor == 0.5, halves, np.round(scaled))
+    return (rounded / multiplier).tolist()
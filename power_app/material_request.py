@@ -1,21 +1,46 @@
+import hashlib
+import json
+
 import frappe
 from frappe import _
 from frappe.model.mapper import get_mapped_doc
+from frappe.utils import cint, flt
+
+from power_app.instrumentation import instrument
+
+BULK_MATERIAL_REQUEST_QUEUE = "long"
+BULK_MATERIAL_REQUEST_CHUNK_SIZE = 20
+# Realtime event for the Quotation list view progress bar (quotation_list.js)
+BULK_MATERIAL_REQUEST_EVENT = "power_app_bulk_material_request"
 
 
 @frappe.whitelist()
-def make_material_request_from_quotation(source, target=None):
+@instrument()
+def make_material_request_from_quotation(source, target=None, aggregate=None):
     """
     Creates a Material Request from a Quotation.
     Maps item details and sets the Material Request Type to 'Purchase'.
 
+    Every Material Request Item keeps the Quotation Item rows it was made from
+    in custom_quotation_items (JSON list), so supplier rates can be applied
+    back to every original line (see quotation.add_items_from_supplier_quotations).
+
     Args:
         source: Quotation document name
         target: Existing Material Request name (optional)
+        aggregate: Merge lines with the same item_code, uom and warehouse
+            (summing qty). Also read from frappe.flags.args when called
+            through frappe.model.open_mapped_doc
 
     Returns:
         Material Request document
     """
+    if aggregate is None:
+        aggregate = (frappe.flags.args or {}).get("aggregate")
+
+    def update_item(source_item, target_item, source_parent):
+        target_item.custom_quotation_items = json.dumps([source_item.name])
+
     # Define the core mapping settings
     def set_missing_values(source, target):
         # Set the Material Request Type
@@ -23,6 +48,8 @@ def make_material_request_from_quotation(source, target=None):
         target.company = source.company
         target.custom_created_from_doctype = "Material Request"
         target.custom_quotation_refrence = source.name
+        if cint(aggregate):
+            merge_material_request_items(target)
         target.run_method("set_missing_values")
 
     # Execute the mapping process
@@ -45,6 +72,7 @@ def make_material_request_from_quotation(source, target=None):
                     "item_code": "item_code",
                     "qty": "qty",
                 },
+                "postprocess": update_item,
             }
         },
         target,
@@ -52,3 +80,163 @@ def make_material_request_from_quotation(source, target=None):
     )
 
     return doc
+
+
+def merge_material_request_items(material_request):
+    """
+    Merge Material Request Items with the same item_code, uom and warehouse
+
+    qty / stock_qty are summed on the first line of each group and the
+    merged lines' custom_quotation_items are appended to it.
+
+    Returns:
+        int: Number of lines removed
+    """
+    merged_rows = {}
+    duplicates = []
+    for row in material_request.get("items"):
+        key = (row.item_code, row.uom, row.warehouse)
+        first_row = merged_rows.get(key)
+        if not first_row:
+            merged_rows[key] = row
+            continue
+
+        first_row.qty = flt(first_row.qty) + flt(row.qty)
+        first_row.stock_qty = flt(first_row.stock_qty) + flt(row.stock_qty)
+        first_row.custom_quotation_items = json.dumps(
+            json.loads(first_row.custom_quotation_items or "[]")
+            + json.loads(row.custom_quotation_items or "[]")
+        )
+        duplicates.append(row)
+
+    if not duplicates:
+        return 0
+
+    for row in duplicates:
+        material_request.remove(row)
+
+    for idx, row in enumerate(material_request.get("items"), start=1):
+        row.idx = idx
+        if row.get("rate"):
+            row.amount = flt(row.rate) * flt(row.qty)
+
+    return len(duplicates)
+
+
+@frappe.whitelist()
+@instrument()
+def make_material_requests_for_quotations(quotations, aggregate=0):
+    """
+    Enqueue Material Request creation for many Quotations (Quotation list view action)
+
+    Args:
+        quotations: List (or JSON list) of Quotation names
+        aggregate: Merge duplicate item lines (see make_material_request_from_quotation)
+
+    Returns:
+        dict: {job_id, total}
+    """
+    if isinstance(quotations, str):
+        quotations = json.loads(quotations)
+
+    quotations = [name for name in dict.fromkeys(quotations or []) if name]
+    if not quotations:
+        frappe.throw(_("No Quotations selected"))
+
+    frappe.has_permission("Material Request", "create", throw=True)
+
+    # Same selection enqueued twice collapses into one job
+    job_id = "power_app:bulk_material_request:{0}".format(
+        hashlib.md5(json.dumps([sorted(quotations), cint(aggregate)]).encode()).hexdigest()
+    )
+    frappe.enqueue(
+        "power_app.material_request.create_material_requests_for_quotations",
+        queue=BULK_MATERIAL_REQUEST_QUEUE,
+        job_id=job_id,
+        deduplicate=True,
+        enqueue_after_commit=True,
+        quotations=quotations,
+        user=frappe.session.user,
+        aggregate=cint(aggregate),
+    )
+
+    return {"job_id": job_id, "total": len(quotations)}
+
+
+@instrument()
+def create_material_requests_for_quotations(quotations, user=None, aggregate=0,
+                                            chunk_size=BULK_MATERIAL_REQUEST_CHUNK_SIZE):
+    """
+    Background job: create one Material Request per Quotation
+
+    Quotations that already have a (non-cancelled) Material Request via
+    custom_quotation_refrence are skipped. Work is committed after every
+    chunk and progress is published to the user who started the job.
+
+    Returns:
+        dict: {total, created, skipped, failed}
+    """
+    existing = set(frappe.get_all(
+        "Material Request",
+        filters={
+            "custom_quotation_refrence": ["in", quotations],
+            "docstatus": ["<", 2],
+        },
+        pluck="custom_quotation_refrence",
+    ))
+
+    summary = {"total": len(quotations), "created": [], "skipped": [], "failed": []}
+    for start in range(0, len(quotations), chunk_size):
+        for quotation in quotations[start:start + chunk_size]:
+            if quotation in existing:
+                summary["skipped"].append(quotation)
+                continue
+
+            # A failing Quotation must not undo the rest of the chunk
+            frappe.db.savepoint("bulk_material_request")
+            try:
+                material_request = insert_material_request(quotation, aggregate=aggregate)
+            except Exception:
+                frappe.db.rollback(save_point="bulk_material_request")
+                frappe.log_error(
+                    title=_("Material Request creation failed for Quotation {0}").format(quotation),
+                    reference_doctype="Quotation",
+                    reference_name=quotation,
+                )
+                summary["failed"].append(quotation)
+                continue
+
+            existing.add(quotation)
+            summary["created"].append(material_request.name)
+
+        frappe.db.commit()
+        publish_bulk_material_request_progress(summary, user)
+
+    publish_bulk_material_request_progress(summary, user, done=True)
+
+    return summary
+
+
+def insert_material_request(quotation, aggregate=0):
+    """
+    Create and insert the Material Request of one Quotation (no commit)
+    """
+    material_request = make_material_request_from_quotation(quotation, aggregate=aggregate)
+    material_request.insert()
+    return material_request
+
+
+def publish_bulk_material_request_progress(summary, user, done=False):
+    processed = len(summary["created"]) + len(summary["skipped"]) + len(summary["failed"])
+    frappe.publish_realtime(
+        BULK_MATERIAL_REQUEST_EVENT,
+        {
+            "processed": processed,
+            "total": summary["total"],
+            "created": len(summary["created"]),
+            "skipped": len(summary["skipped"]),
+            "failed": len(summary["failed"]),
+            "done": done,
+        },
+        user=user,
+    )
@@ -0,0 +1,167 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Best supplier offer per item for a customer Quotation
+
+Offers come from Supplier Offer (power_app.supplier_offers). Every offer is
+normalized before it is compared:
+- UOM: rate per stock unit (rate / conversion_factor)
+- Currency: converted to the Quotation currency with one exchange rate per
+  currency, looked up once per call
+- Landed rate: the Supplier Quotation's Service Expenses are spread by
+  amount, so every rate of that quotation grows by
+  total expenses / base total
+Offers with valid_till before the given date are skipped. One pass over the
+offers keeps the best offer per item_code.
+"""
+
+import frappe
+from frappe import _
+from frappe.query_builder.functions import Sum
+from frappe.utils import flt, getdate
+
+from power_app.service_expenses import EXPENSE_TABLE_FIELD
+
+LOWEST_LANDED_RATE = "lowest_landed_rate"
+EARLIEST_DELIVERY = "earliest_delivery"
+POLICIES = (LOWEST_LANDED_RATE, EARLIEST_DELIVERY)
+
+
+def select_best_offers(quotation, policy=LOWEST_LANDED_RATE, on_date=None):
+    """
+    Best valid offer per item_code for a Quotation document
+
+    Args:
+        quotation: Quotation document (name, currency)
+        policy: LOWEST_LANDED_RATE (ties: earlier delivery) or
+            EARLIEST_DELIVERY (ties: lower landed rate); offers without a
+            delivery date come last
+        on_date: Offers valid_till before this date are skipped (default today)
+
+    Returns:
+        frappe._dict: picks {item_code: offer}, expired (number of offers skipped)
+            Every picked offer has stock_rate (rate per stock unit in the
+            Quotation currency) and landed_rate (stock_rate with expenses)
+    """
+    if policy not in POLICIES:
+        frappe.throw(_("Policy must be one of {0}").format(", ".join(POLICIES)))
+
+    on_date = getdate(on_date)
+    offers = get_offers(quotation.name)
+    expense_factors = get_expense_factors({offer.supplier_quotation for offer in offers})
+    exchange_rates = get_exchange_rates({offer.currency for offer in offers}, quotation.currency, on_date)
+
+    picks = {}
+    best_keys = {}
+    expired = 0
+    for offer in offers:
+        if offer.valid_till and getdate(offer.valid_till) < on_date:
+            expired += 1
+            continue
+
+        offer.stock_rate = (
+            flt(offer.rate) * exchange_rates[offer.currency] / (flt(offer.conversion_factor) or 1)
+        )
+        offer.landed_rate = offer.stock_rate * (1 + expense_factors.get(offer.supplier_quotation, 0))
+
+        key = get_sort_key(offer, policy)
+        if offer.item_code not in best_keys or key < best_keys[offer.item_code]:
+            best_keys[offer.item_code] = key
+            picks[offer.item_code] = offer
+
+    return frappe._dict(picks=picks, expired=expired)
+
+
+def get_sort_key(offer, policy):
+    # Missing delivery dates sort after every real date
+    delivery = (offer.delivery_time is None, getdate(offer.delivery_time) if offer.delivery_time else None)
+    if policy == EARLIEST_DELIVERY:
+        return (*delivery, offer.landed_rate, offer.supplier_quotation_item)
+    return (offer.landed_rate, *delivery, offer.supplier_quotation_item)
+
+
+def get_offers(quotation_name):
+    offer = frappe.qb.DocType("Supplier Offer")
+    return (
+        frappe.qb.from_(offer)
+        .select(
+            offer.supplier_quotation_item,
+            offer.supplier_quotation,
+            offer.item_code,
+            offer.item_name,
+            offer.qty,
+            offer.uom,
+            offer.conversion_factor,
+            offer.currency,
+            offer.rate,
+            offer.valid_till,
+            offer.delivery_time,
+        )
+        .where(offer.quotation == quotation_name)
+        .run(as_dict=True)
+    )
+
+
+def get_expense_factors(supplier_quotations):
+    """
+    Service Expense total / base total per Supplier Quotation
+
+    Returns:
+        dict: {supplier_quotation: factor}, quotations without expenses are left out
+    """
+    if not supplier_quotations:
+        return {}
+
+    expense = frappe.qb.DocType("Service Expense")
+    expenses = dict(
+        frappe.qb.from_(expense)
+        .select(expense.parent, Sum(expense.amount))
+        .where(
+            (expense.parenttype == "Supplier Quotation")
+            & (expense.parentfield == EXPENSE_TABLE_FIELD)
+            & expense.parent.isin(list(supplier_quotations))
+        )
+        .groupby(expense.parent)
+        .run()
+    )
+    if not expenses:
+        return {}
+
+    base_totals = dict(frappe.get_all(
+        "Supplier Quotation",
+        filters={"name": ["in", list(expenses)]},
+        fields=["name", "base_total"],
+        as_list=True,
+    ))
+
+    return {
+        name: flt(amount) / flt(base_totals[name])
+        for name, amount in expenses.items()
+        if flt(base_totals.get(name))
+    }
+
+
+def get_exchange_rates(currencies, to_currency, on_date):
+    """
+    One exchange rate per currency into to_currency
+
+    Returns:
+        dict: {currency: rate}
+    """
+    from erpnext.setup.utils import get_exchange_rate
+
+    rates = {}
+    for currency in currencies:
+        if not currency or currency == to_currency:
+            rates[currency] = 1.0
+            continue
+
+        rate = flt(get_exchange_rate(currency, to_currency, on_date))
+        if not rate:
+            frappe.throw(
+                _("Exchange rate from {0} to {1} not found").format(currency, to_currency)
+            )
+        rates[currency] = rate
+
+    return rates
@@ -0,0 +1,8 @@
+from power_app.supplier_offers import rebuild_supplier_offers
+
+
+def execute():
+    """
+    Fill Supplier Offer from the Supplier Quotations submitted before it existed
+    """
+    rebuild_supplier_offers()
@@ -4,6 +4,16 @@
 # import frappe
 from frappe.model.document import Document
 
+from power_app.service_expenses import clear_expense_template_cache
+
 
 class ExpenseTemplate(Document):
-	pass
+	def on_update(self):
+		clear_expense_template_cache(self.name)
+
+	def on_trash(self):
+		clear_expense_template_cache(self.name)
+
+	def after_rename(self, old, new, merge=False):
+		clear_expense_template_cache(old)
+		clear_expense_template_cache(new)
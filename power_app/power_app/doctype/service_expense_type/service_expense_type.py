@@ -4,6 +4,16 @@
 # import frappe
 from frappe.model.document import Document
 
+from power_app.service_expenses import clear_service_expense_type_cache
+
 
 class ServiceExpenseType(Document):
-	pass
+	def on_update(self):
+		clear_service_expense_type_cache(self.name)
+
+	def on_trash(self):
+		clear_service_expense_type_cache(self.name)
+
+	def after_rename(self, old, new, merge=False):
+		clear_service_expense_type_cache(old)
+		clear_service_expense_type_cache(new)
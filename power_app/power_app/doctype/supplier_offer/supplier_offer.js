@@ -0,0 +1,8 @@
+// Copyright (c) 2025, Hadeel Milad and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Supplier Offer", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,10 @@
+# Copyright (c) 2025, Hadeel Milad and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class SupplierOffer(Document):
+	# Rows are written by power_app.supplier_offers only
+	pass
@@ -0,0 +1,102 @@
+// Copyright (c) 2025, Hadeel Milad and contributors
+// For license information, please see license.txt
+
+// Rolling call metrics recorded by power_app.instrumentation
+frappe.pages['power-app-stats'].on_page_load = function (wrapper) {
+	const page = frappe.ui.make_app_page({
+		parent: wrapper,
+		title: __('Power App Stats'),
+		single_column: true,
+	});
+
+	const columns = [
+		{ fieldname: 'metric', label: __('Method') },
+		{ fieldname: 'calls', label: __('Calls'), numeric: true },
+		{ fieldname: 'failed', label: __('Failed'), numeric: true },
+		{ fieldname: 'wall_ms_p50', label: __('p50 ms'), numeric: true },
+		{ fieldname: 'wall_ms_p90', label: __('p90 ms'), numeric: true },
+		{ fieldname: 'wall_ms_p99', label: __('p99 ms'), numeric: true },
+		{ fieldname: 'sql_ms_p50', label: __('SQL p50 ms'), numeric: true },
+		{ fieldname: 'sql_ms_p90', label: __('SQL p90 ms'), numeric: true },
+		{ fieldname: 'queries_p50', label: __('Queries p50'), numeric: true },
+		{ fieldname: 'queries_max', label: __('Queries max'), numeric: true },
+		{ fieldname: 'rows_avg', label: __('Rows avg'), numeric: true },
+		{ fieldname: 'payload_bytes_avg', label: __('Payload bytes avg'), numeric: true },
+	];
+
+	const $summary = $('<p class="text-muted"></p>').appendTo(page.main);
+	const $table = $(`<div class="table-responsive">
+		<table class="table table-bordered table-hover">
+			<thead><tr></tr></thead>
+			<tbody></tbody>
+		</table>
+	</div>`).appendTo(page.main);
+
+	columns.forEach((column) => {
+		$('<th>')
+			.text(column.label)
+			.toggleClass('text-right', !!column.numeric)
+			.appendTo($table.find('thead tr'));
+	});
+
+	const refresh = () => {
+		frappe.call({
+			method: 'power_app.instrumentation.get_instrumentation_stats',
+			freeze: true,
+			callback(r) {
+				render((r && r.message) || {});
+			},
+		});
+	};
+
+	const render = (stats) => {
+		const metrics = stats.metrics || [];
+
+		if (!stats.sample_rate) {
+			$summary.text(
+				__(
+					'Sampling is off. Set power_app_instrumentation_sample_rate (0 to 1) in site config to record calls.'
+				)
+			);
+		} else {
+			$summary.text(
+				__('Sample rate {0}, last {1} samples per method', [
+					stats.sample_rate,
+					stats.max_samples,
+				])
+			);
+		}
+
+		const $body = $table.find('tbody').empty();
+		if (!metrics.length) {
+			$(`<tr><td colspan="${columns.length}" class="text-muted text-center"></td></tr>`)
+				.find('td')
+				.text(__('No samples recorded'))
+				.end()
+				.appendTo($body);
+			return;
+		}
+
+		metrics.forEach((row) => {
+			const $row = $('<tr>').appendTo($body);
+			columns.forEach((column) => {
+				$('<td>')
+					.text(row[column.fieldname] ?? '')
+					.toggleClass('text-right', !!column.numeric)
+					.appendTo($row);
+			});
+		});
+	};
+
+	page.set_primary_action(__('Refresh'), refresh, 'refresh');
+	page.set_secondary_action(__('Reset'), () => {
+		frappe.confirm(__('Clear all recorded samples?'), () => {
+			frappe.call({
+				method: 'power_app.instrumentation.reset_instrumentation_stats',
+				callback: refresh,
+			});
+		});
+	});
+
+	refresh();
+};
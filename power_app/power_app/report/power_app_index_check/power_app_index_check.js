@@ -0,0 +1,23 @@
+// Copyright (c) 2025, Hadeel Milad and contributors
+// For license information, please see license.txt
+
+frappe.query_reports['Power App Index Check'] = {
+	filters: [
+		{
+			fieldname: 'full_scans_only',
+			label: __('Full Scans Only'),
+			fieldtype: 'Check',
+			default: 1,
+		},
+	],
+
+	formatter: function (value, row, column, data, default_formatter) {
+		value = default_formatter(value, row, column, data);
+
+		if (data && data.full_scan && column.fieldname === 'access_type') {
+			value = `<span style="color: var(--red-600); font-weight: bold;">${value}</span>`;
+		}
+
+		return value;
+	},
+};
@@ -0,0 +1,86 @@
+# Copyright (c) 2025, Hadeel Milad and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+
+from power_app.indexes import explain_queries, get_missing_indexes
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+
+	if frappe.db.db_type != "mariadb":
+		return get_columns(), [], _("Query plans are only checked on MariaDB")
+
+	data = explain_queries()
+	if filters.get("full_scans_only"):
+		data = [row for row in data if row.full_scan]
+
+	return get_columns(), data, get_message()
+
+
+def get_message():
+	"""
+	Managed indexes that are not on the database yet (added on the next bench migrate)
+	"""
+	missing = get_missing_indexes()
+	if not missing:
+		return None
+
+	return _("Missing indexes, added on the next migrate: {0}").format(
+		", ".join(f"{doctype} ({', '.join(columns)})" for doctype, columns in missing)
+	)
+
+
+def get_columns():
+	return [
+		{
+			"fieldname": "query",
+			"label": _("Query"),
+			"fieldtype": "Data",
+			"width": 320,
+		},
+		{
+			"fieldname": "table",
+			"label": _("Table"),
+			"fieldtype": "Data",
+			"width": 120,
+		},
+		{
+			"fieldname": "full_scan",
+			"label": _("Full Scan"),
+			"fieldtype": "Check",
+			"width": 90,
+		},
+		{
+			"fieldname": "access_type",
+			"label": _("Access Type"),
+			"fieldtype": "Data",
+			"width": 100,
+		},
+		{
+			"fieldname": "possible_keys",
+			"label": _("Possible Keys"),
+			"fieldtype": "Data",
+			"width": 220,
+		},
+		{
+			"fieldname": "key",
+			"label": _("Key Used"),
+			"fieldtype": "Data",
+			"width": 220,
+		},
+		{
+			"fieldname": "rows",
+			"label": _("Estimated Rows"),
+			"fieldtype": "Int",
+			"width": 120,
+		},
+		{
+			"fieldname": "extra",
+			"label": _("Extra"),
+			"fieldtype": "Data",
+			"width": 250,
+		},
+	]
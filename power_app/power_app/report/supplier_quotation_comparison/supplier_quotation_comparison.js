@@ -0,0 +1,73 @@
+// Copyright (c) 2025, Hadeel Milad and contributors
+// For license information, please see license.txt
+
+frappe.query_reports['Supplier_Quotation_Comparison'] = {
+	filters: [
+		{
+			fieldname: 'company',
+			label: __('Company'),
+			fieldtype: 'Link',
+			options: 'Company',
+			default: frappe.defaults.get_user_default('Company'),
+			reqd: 1,
+		},
+		{
+			fieldname: 'from_date',
+			label: __('From Date'),
+			fieldtype: 'Date',
+			default: frappe.datetime.add_months(frappe.datetime.get_today(), -1),
+			reqd: 1,
+		},
+		{
+			fieldname: 'to_date',
+			label: __('To Date'),
+			fieldtype: 'Date',
+			default: frappe.datetime.get_today(),
+			reqd: 1,
+		},
+		{
+			fieldname: 'item_code',
+			label: __('Item'),
+			fieldtype: 'Link',
+			options: 'Item',
+		},
+		{
+			fieldname: 'supplier',
+			label: __('Supplier'),
+			fieldtype: 'Link',
+			options: 'Supplier',
+		},
+		{
+			fieldname: 'supplier_quotation',
+			label: __('Supplier Quotation'),
+			fieldtype: 'Link',
+			options: 'Supplier Quotation',
+			get_query: () => {
+				return { filters: { docstatus: 1 } };
+			},
+		},
+		{
+			fieldname: 'request_for_quotation',
+			label: __('Request for Quotation'),
+			fieldtype: 'Link',
+			options: 'Request for Quotation',
+		},
+		{
+			fieldname: 'material_request',
+			label: __('Material Request'),
+			fieldtype: 'Link',
+			options: 'Material Request',
+		},
+	],
+
+	formatter: function (value, row, column, data, default_formatter) {
+		value = default_formatter(value, row, column, data);
+
+		// Highlight the lowest offer of each item
+		if (data && data.price_rank === 1 && ['price', 'base_rate'].includes(column.fieldname)) {
+			value = `<span style="color: var(--green-600); font-weight: bold;">${value}</span>`;
+		}
+
+		return value;
+	},
+};
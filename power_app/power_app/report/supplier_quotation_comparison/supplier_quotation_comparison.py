@@ -0,0 +1,248 @@
+# Copyright (c) 2025, Hadeel Milad and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+
+import frappe
+from frappe import _
+
+# One hash per site, one field per filter set
+REPORT_CACHE_KEY = "power_app:supplier_quotation_comparison"
+# The hash expires REPORT_CACHE_TTL seconds after its first entry and is
+# dropped when it holds REPORT_CACHE_MAX_ENTRIES filter sets
+REPORT_CACHE_TTL = 15 * 60
+REPORT_CACHE_MAX_ENTRIES = 200
+
+FILTER_FIELDS = (
+	"company",
+	"from_date",
+	"to_date",
+	"supplier",
+	"supplier_quotation",
+	"request_for_quotation",
+	"material_request",
+	"item_code",
+)
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	validate_filters(filters)
+
+	return get_columns(), get_data(filters)
+
+
+def validate_filters(filters):
+	if not filters.get("company"):
+		frappe.throw(_("Please select a Company"))
+
+	if not (filters.get("from_date") and filters.get("to_date")):
+		frappe.throw(_("Please select From Date and To Date"))
+
+	if filters.from_date > filters.to_date:
+		frappe.throw(_("From Date cannot be after To Date"))
+
+
+def get_data(filters):
+	"""
+	Report rows for a filter set, served from cache when available
+
+	Cached results are dropped by clear_report_cache
+	(Supplier Quotation on_submit / on_cancel, Material Request on_update)
+	and expire after REPORT_CACHE_TTL.
+	"""
+	cache_field = get_cache_field(filters)
+
+	data = frappe.cache.hget(REPORT_CACHE_KEY, cache_field)
+	if data is None:
+		data = get_comparison_rows(filters)
+		set_cached_rows(cache_field, data)
+
+	return data
+
+
+def set_cached_rows(cache_field, data):
+	key = frappe.cache.make_key(REPORT_CACHE_KEY)
+	if frappe.cache.hlen(key) >= REPORT_CACHE_MAX_ENTRIES:
+		frappe.cache.delete_key(REPORT_CACHE_KEY)
+
+	frappe.cache.hset(REPORT_CACHE_KEY, cache_field, data)
+	# Only a new hash gets an expiry, so later entries do not keep it alive
+	if frappe.cache.ttl(key) < 0:
+		frappe.cache.expire(key, REPORT_CACHE_TTL)
+
+
+def get_cache_field(filters):
+	values = {field: filters.get(field) for field in FILTER_FIELDS if filters.get(field)}
+	return hashlib.md5(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_comparison_rows(filters):
+	"""
+	All report columns in one statement
+
+	lowest_price / price_rank are computed per item over base_rate,
+	so quotations in different currencies are compared in company currency.
+	"""
+	conditions = []
+	for field, column in (
+		("supplier", "sq.supplier"),
+		("supplier_quotation", "sq.name"),
+		("request_for_quotation", "sqi.request_for_quotation"),
+		("material_request", "sqi.material_request"),
+		("item_code", "sqi.item_code"),
+	):
+		if filters.get(field):
+			conditions.append(f"and {column} = %({field})s")
+
+	return frappe.db.sql(
+		"""
+		select
+			sq.supplier,
+			sq.supplier_name,
+			sqi.item_code,
+			sqi.item_name,
+			sqi.uom,
+			sqi.qty,
+			sqi.rate as price,
+			sqi.base_rate,
+			min(sqi.base_rate) over (partition by sqi.item_code) as lowest_price,
+			rank() over (partition by sqi.item_code order by sqi.base_rate) as price_rank,
+			sqi.request_for_quotation,
+			sqi.material_request,
+			sq.name as quotation,
+			sq.transaction_date,
+			cast(sq.custom_total_expenses as decimal(21, 9)) as custom_total_expenses,
+			sq.valid_till,
+			sq.custom_delivery_time,
+			sq.currency
+		from `tabSupplier Quotation Item` sqi
+		inner join `tabSupplier Quotation` sq on sq.name = sqi.parent
+		where sq.docstatus = 1
+			and sq.company = %(company)s
+			and sq.transaction_date between %(from_date)s and %(to_date)s
+			{conditions}
+		order by sqi.item_code, price_rank, sq.supplier
+		""".format(conditions=" ".join(conditions)),
+		filters,
+		as_dict=True,
+	)
+
+
+def get_columns():
+	return [
+		{
+			"fieldname": "item_code",
+			"label": _("Item"),
+			"fieldtype": "Link",
+			"options": "Item",
+			"width": 150,
+		},
+		{
+			"fieldname": "supplier",
+			"label": _("Supplier"),
+			"fieldtype": "Link",
+			"options": "Supplier",
+			"width": 150,
+		},
+		{
+			"fieldname": "supplier_name",
+			"label": _("Supplier Name"),
+			"fieldtype": "Data",
+			"width": 150,
+		},
+		{
+			"fieldname": "uom",
+			"label": _("UOM"),
+			"fieldtype": "Link",
+			"options": "UOM",
+			"width": 90,
+		},
+		{
+			"fieldname": "qty",
+			"label": _("Quantity"),
+			"fieldtype": "Float",
+			"width": 80,
+		},
+		{
+			"fieldname": "price",
+			"label": _("Price"),
+			"fieldtype": "Currency",
+			"options": "currency",
+			"width": 110,
+		},
+		{
+			"fieldname": "base_rate",
+			"label": _("Price (Company Currency)"),
+			"fieldtype": "Currency",
+			"width": 130,
+		},
+		{
+			"fieldname": "lowest_price",
+			"label": _("Lowest Price"),
+			"fieldtype": "Currency",
+			"width": 110,
+		},
+		{
+			"fieldname": "price_rank",
+			"label": _("Rank"),
+			"fieldtype": "Int",
+			"width": 70,
+		},
+		{
+			"fieldname": "request_for_quotation",
+			"label": _("Request for Quotation"),
+			"fieldtype": "Link",
+			"options": "Request for Quotation",
+			"width": 150,
+		},
+		{
+			"fieldname": "material_request",
+			"label": _("Material Request"),
+			"fieldtype": "Link",
+			"options": "Material Request",
+			"width": 150,
+		},
+		{
+			"fieldname": "quotation",
+			"label": _("Supplier Quotation"),
+			"fieldtype": "Link",
+			"options": "Supplier Quotation",
+			"width": 200,
+		},
+		{
+			"fieldname": "custom_total_expenses",
+			"label": _("Total Expenses"),
+			"fieldtype": "Currency",
+			"options": "currency",
+			"width": 110,
+		},
+		{
+			"fieldname": "valid_till",
+			"label": _("Valid Till"),
+			"fieldtype": "Date",
+			"width": 100,
+		},
+		{
+			"fieldname": "custom_delivery_time",
+			"label": _("Delivery Time"),
+			"fieldtype": "Date",
+			"width": 100,
+		},
+		{
+			"fieldname": "currency",
+			"label": _("Currency"),
+			"fieldtype": "Link",
+			"options": "Currency",
+			"width": 110,
+		},
+	]
+
+
+def clear_report_cache(doc, method=None):
+	"""
+	Document event handler for Supplier Quotation on_submit / on_cancel
+	and Material Request on_update (custom_quotation_refrence)
+	"""
+	frappe.db.after_commit.add(lambda: frappe.cache.delete_key(REPORT_CACHE_KEY))
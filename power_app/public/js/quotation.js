@@ -58,6 +58,7 @@ frappe.ui.form.on('Quotation', {
 		make_MR(frm);
 		add_compare_supplier_quotations_button(frm);
 		add_select_items_from_supplier_quotations_button(frm);
+		show_procurement_status(frm);
 		frm.trigger('set_item_query');
 		// Update total expenses when form is refreshed
 		update_total_expenses(frm);
@@ -116,6 +117,7 @@ frappe.ui.form.on('Quotation', {
 // Handle Service Expense table changes - Update rates immediately (without saving)
 let expense_update_timeout = null;
 let is_recalculating = false;
+let expense_preview_request = 0;
 
 /**
  * Fetch expense template data and populate custom_service_expense_table child table
@@ -180,8 +182,10 @@ function update_total_expenses(frm) {
 }
 
 /**
- * Calculate and update item rates based on expenses and margin (client-side, no save)
- * Replicates the logic from quotation_validate in Python
+ * Calculate and update item rates based on expenses and margin (no save)
+ * Rates come from power_app.quotation.preview_quotation_rates, which uses the
+ * same calculation as quotation_validate in Python
+ * Returns a promise that settles once the rates are set (nothing when skipped)
  */
 function calculate_expense_rates(frm) {
 	// Skip if quotation_to is not set (required field, prevents save errors)
@@ -193,144 +197,96 @@ function calculate_expense_rates(frm) {
 		return;
 	}
 
-	// Step 1: Restore original rates before applying expenses
-	// Store original rates for each item
-	const item_original_rates = {};
-
-	frm.doc.items.forEach((item) => {
-		// Skip if item doesn't have a name (new row not yet saved)
-		if (!item.name) {
+	// Only send the fields used by the calculation
+	const items = frm.doc.items.map((item) => ({
+		item_code: item.item_code,
+		qty: item.qty,
+		rate: item.rate,
+		price_list_rate: item.price_list_rate,
+		custom_supplier_quotation: item.custom_supplier_quotation,
+		custom_supplier_quotation_item_rate: item.custom_supplier_quotation_item_rate,
+	}));
+	const expenses = (frm.doc.custom_service_expense_table || []).map((expense) => ({
+		amount: expense.amount,
+	}));
+
+	// Ignore responses of older requests
+	const request_id = ++expense_preview_request;
+	const item_names = frm.doc.items.map((item) => item.name);
+
+	return frappe.call({
+		method: 'power_app.quotation.preview_quotation_rates',
+		args: {
+			items: items,
+			expenses: expenses,
+			margin: frm.doc.custom_item_margin || 0,
+			currency: frm.doc.currency,
+		},
+	}).then((r) => {
+		if (!r.message || request_id !== expense_preview_request) {
 			return;
 		}
 
-		let original_rate = null;
-
-		// Step 1: Get original rate
-		// Priority: custom_supplier_quotation_item_rate > price_list_rate > current rate
-		if (
-			item.custom_supplier_quotation_item_rate &&
-			flt(item.custom_supplier_quotation_item_rate) > 0
-		) {
-			// Use custom_supplier_quotation_item_rate if available (saved from Supplier Quotation)
-			original_rate = flt(item.custom_supplier_quotation_item_rate);
-		} else if (flt(item.price_list_rate) > 0) {
-			// Use price_list_rate if available
-			original_rate = flt(item.price_list_rate);
-		} else {
-			// Fallback to current rate
-			original_rate = flt(item.rate) || 0;
-		}
-
-		// Store original rate (use name or idx as key)
-		const item_key = item.name || item.idx;
-		item_original_rates[item_key] = original_rate;
-
-		// Restore original rate temporarily for calculation
-		frappe.model.set_value(item.doctype, item.name, 'rate', original_rate);
-	});
-
-	// Step 2: Calculate total expenses
-	let total_expenses = 0;
-	if (frm.doc.custom_service_expense_table && frm.doc.custom_service_expense_table.length > 0) {
-		frm.doc.custom_service_expense_table.forEach((expense) => {
-			total_expenses += flt(expense.amount) || 0;
+		const has_expense_field = frappe.meta.has_field(
+			'Quotation Item',
+			'custom_item_expense_amount',
+		);
+		const values_by_name = {};
+		item_names.forEach((name, idx) => {
+			values_by_name[name] = r.message.items[idx];
 		});
-	}
-
-	// Step 3: Calculate total item amount for expense distribution
-	let total_item_amount = 0;
-	frm.doc.items.forEach((item) => {
-		const qty = flt(item.qty) || 1;
-		const rate = flt(item.rate) || 0;
-		total_item_amount += rate * qty;
-	});
 
-	// Step 4: Distribute expenses to items
-	if (total_item_amount > 0 && total_expenses > 0) {
+		// set_value promises, so callers can wait for the change handlers
+		const updates = [];
 		frm.doc.items.forEach((item) => {
-			// Skip if item doesn't have a name (new row not yet saved)
-			if (!item.name) {
+			const values = values_by_name[item.name];
+			if (!values) {
+				// Row added while the preview was running
 				return;
 			}
 
-			const qty = flt(item.qty) || 1;
-			const current_rate = flt(item.rate) || 0;
-			const item_amount = current_rate * qty;
-
-			// Calculate expense per unit
-			const expense_per_item = ((item_amount / total_item_amount) * total_expenses) / qty;
-			// Calculate total expense amount for this item
-			const expense_amount_for_item = expense_per_item * qty;
-
-			// Get original rate
-			const item_key = item.name || item.idx;
-			const original_rate = item_original_rates[item_key] || 0;
-
-			// Update rate with expense (only rate field)
-			const new_rate = flt(original_rate) + expense_per_item;
-			frappe.model.set_value(item.doctype, item.name, 'rate', new_rate);
-
-			// Store expense amount in custom field
+			// Update only the fields that changed
 			if (
-				item.meta &&
-				item.meta.has_field &&
-				item.meta.has_field('custom_item_expense_amount')
+				flt(values.custom_supplier_quotation_item_rate) !==
+				flt(item.custom_supplier_quotation_item_rate)
 			) {
-				frappe.model.set_value(
-					item.doctype,
-					item.name,
-					'custom_item_expense_amount',
-					expense_amount_for_item,
+				updates.push(
+					frappe.model.set_value(
+						item.doctype,
+						item.name,
+						'custom_supplier_quotation_item_rate',
+						values.custom_supplier_quotation_item_rate,
+					),
 				);
 			}
-		});
-	} else {
-		// If no expenses, reset custom_item_expense_amount to 0
-		frm.doc.items.forEach((item) => {
-			if (!item.name) {
-				return;
+			if (flt(values.rate) !== flt(item.rate)) {
+				updates.push(frappe.model.set_value(item.doctype, item.name, 'rate', values.rate));
 			}
 			if (
-				item.meta &&
-				item.meta.has_field &&
-				item.meta.has_field('custom_item_expense_amount')
+				has_expense_field &&
+				flt(values.custom_item_expense_amount) !== flt(item.custom_item_expense_amount)
 			) {
-				frappe.model.set_value(item.doctype, item.name, 'custom_item_expense_amount', 0);
+				updates.push(
+					frappe.model.set_value(
+						item.doctype,
+						item.name,
+						'custom_item_expense_amount',
+						values.custom_item_expense_amount,
+					),
+				);
 			}
 		});
-	}
 
-	// Step 5: Apply margin if exists (AFTER expenses are added)
-	// Margin is applied on: (Original Rate + Distributed Expenses)
-	if (frm.doc.custom_item_margin && flt(frm.doc.custom_item_margin) !== 0) {
-		const margin_percentage = flt(frm.doc.custom_item_margin);
+		// Refresh the items field to show updated rates
+		frm.refresh_field('items');
 
-		frm.doc.items.forEach((item) => {
-			// Skip if item doesn't have a name (new row not yet saved)
-			if (!item.name) {
-				return;
-			}
-
-			// Get current rate (which already includes expenses from Step 4)
-			// This is: Original Rate + Distributed Expenses
-			const rate_after_expenses = flt(item.rate) || 0;
-
-			// Calculate margin amount based on rate AFTER expenses
-			const margin_amount = (rate_after_expenses * margin_percentage) / 100;
-			const final_rate = rate_after_expenses + margin_amount;
-
-			// Update only rate field (Original + Expenses + Margin)
-			frappe.model.set_value(item.doctype, item.name, 'rate', final_rate);
-		});
-	}
-
-	// Refresh the items field to show updated rates
-	frm.refresh_field('items');
+		// Trigger calculate_taxes_and_totals if available
+		if (frm.script_manager && frm.script_manager.trigger_handler) {
+			frm.script_manager.trigger('calculate_taxes_and_totals');
+		}
 
-	// Trigger calculate_taxes_and_totals if available
-	if (frm.script_manager && frm.script_manager.trigger_handler) {
-		frm.script_manager.trigger('calculate_taxes_and_totals');
-	}
+		return Promise.all(updates);
+	});
 }
 
 function trigger_expense_recalculation(frm) {
@@ -354,10 +310,11 @@ function trigger_expense_recalculation(frm) {
 			is_recalculating = true;
 			console.log('[quotation.js] (Recalculating rates after expense change - live update)');
 
-			// Calculate and update rates without saving
-			calculate_expense_rates(frm);
-
-			is_recalculating = false;
+			// Calculate and update rates without saving; the guard stays on until
+			// the preview has been applied and its change handlers have run
+			Promise.resolve(calculate_expense_rates(frm)).finally(() => {
+				is_recalculating = false;
+			});
 		}
 	}, 300); // Wait 300ms after last change for smoother experience
 }
@@ -482,52 +439,27 @@ function add_show_item_history_button(frm) {
 		);
 	}
 }
-// Function to fetch item-specific data
+// Function to fetch item-specific data (one batch call for all items)
 async function fetch_item_details(frm, item_codes) {
-	const details_promises = item_codes.map(async (item_code) => {
-		// --- 1. Get On Hand Quantity (CORRECTED FUNCTION PATH) ---
-		const stock_res = await frappe.call({
-			// *** CHANGE MADE HERE ***
-			method: 'power_app.item.get_item_details',
-			args: {
-				item_code: item_code,
-				// warehouse: frm.doc.warehouse || frappe.defaults.get_user_default('default_warehouse'),
-				// The API often returns stock under the 'actual_qty' key
-			},
-		});
-		console.log(`[quotation.js] (Item details fetched: ${item_code})`);
-		// Adjusting how the result is read, as 'get_item_stock' returns an object
-		const stock_qty =
-			stock_res.message && stock_res.message.stock_qty ? stock_res.message.stock_qty : 0;
-
-		// ... rest of your function remains the same ...
-		// --- 2. Get Last Selling Rate ---
-		// ... (your existing code for selling price) ...
-		// const last_selling_rate = 0; // Placeholder
-		const last_selling_rate =
-			stock_res.message && stock_res.message.last_selling_rate
-				? stock_res.message.last_selling_rate
-				: 0;
-		// --- 3. Get Last Supplier Purchase Rate ---
-		// ... (your existing code for purchase rate) ...
-		// const last_purchase_rate = 0; // Placeholder
-		const last_purchase_rate =
-			stock_res.message && stock_res.message.last_purchase_rate
-				? stock_res.message.last_purchase_rate
-				: 0;
-		const supplier =
-			stock_res.message && stock_res.message.supplier ? stock_res.message.supplier : 0;
+	const res = await frappe.call({
+		method: 'power_app.item.get_items_details',
+		args: {
+			item_codes: item_codes,
+		},
+	});
+	const details = res.message || {};
+	console.log(`[quotation.js] (Item details fetched: ${Object.keys(details).length} items)`);
 
+	return item_codes.map((item_code) => {
+		const item = details[item_code] || {};
 		return {
 			item_code: item_code,
-			stock_qty: stock_qty,
-			last_selling_rate: last_selling_rate,
-			last_purchase_rate: last_purchase_rate,
-			supplier: supplier || __('Default'),
+			stock_qty: item.stock_qty || 0,
+			last_selling_rate: item.last_selling_rate || 0,
+			last_purchase_rate: item.last_purchase_rate || 0,
+			supplier: item.supplier || __('Default'),
 		};
 	});
-
-	return Promise.all(details_promises);
 }
 
 // Build the HTML table for the item details dialog
@@ -667,11 +599,32 @@ function make_MR(frm) {
 		frm.page.add_inner_button(
 			__('Material Request'),
 			function () {
-				frappe.model.open_mapped_doc({
-					method: 'power_app.material_request.make_material_request_from_quotation',
-					frm: frm,
-					args: {},
-				});
+				const open_material_request = (aggregate) => {
+					frappe.model.open_mapped_doc({
+						method: 'power_app.material_request.make_material_request_from_quotation',
+						frm: frm,
+						args: { aggregate: aggregate },
+					});
+				};
+
+				// Offer to merge lines with the same item, UOM and warehouse
+				const line_keys = (frm.doc.items || []).map((item) =>
+					[item.item_code, item.uom, item.warehouse].join('::'),
+				);
+				const duplicate_lines = line_keys.length - new Set(line_keys).size;
+				if (!duplicate_lines) {
+					open_material_request(0);
+					return;
+				}
+
+				frappe.confirm(
+					__(
+						'{0} item lines repeat an item with the same UOM and warehouse. Merge them into one Material Request line each?',
+						[duplicate_lines],
+					),
+					() => open_material_request(1),
+					() => open_material_request(0),
+				);
 			},
 			null, // No group, makes it a standalone button
 			'info', // Light blue color (different from primary)
@@ -736,6 +689,56 @@ function add_compare_supplier_quotations_button(frm) {
 	}
 }
 
+// Function to show procurement pipeline progress (MR → RFQ → Supplier Quotations)
+function show_procurement_status(frm) {
+	if (frm.is_new() || frm.doc.docstatus !== 0) {
+		return;
+	}
+
+	// Fetched once per loaded version of the document, refresh only re-renders
+	const key = `${frm.doc.name}:${frm.doc.modified}`;
+	if (frm.procurement_status && frm.procurement_status.key === key) {
+		set_procurement_status_headline(frm, frm.procurement_status.totals);
+		return;
+	}
+	frm.procurement_status = { key: key, totals: null };
+
+	frappe.call({
+		method: 'power_app.quotation.get_material_requests_from_quotation',
+		args: {
+			quotation_name: frm.doc.name,
+			with_totals: 1,
+		},
+		callback: function (r) {
+			if (!r.message || frm.procurement_status.key !== key) {
+				return;
+			}
+
+			frm.procurement_status.totals = r.message.totals;
+			set_procurement_status_headline(frm, r.message.totals);
+		},
+	});
+}
+
+function set_procurement_status_headline(frm, totals) {
+	if (!totals || !totals.material_request_count) {
+		return;
+	}
+
+	frm.dashboard.set_headline(
+		__(
+			'Procurement: {0} Material Request(s), {1} RFQ(s), {2} submitted Supplier Quotation(s), {3} item(s) quoted',
+			[
+				totals.material_request_count,
+				totals.rfq_count,
+				totals.supplier_quotation_count,
+				totals.quoted_item_count,
+			],
+		),
+		totals.supplier_quotation_count ? 'green' : 'orange',
+	);
+}
+
 // Function to show Material Request selection dialog
 function show_material_request_selection_dialog(frm, mr_list) {
 	// Build options for Material Request selection
@@ -816,13 +819,12 @@ function build_supplier_quotation_comparison_url(company, rfq_name) {
 	const fromDate = frappe.datetime.add_months(today, -1);
 
 	// Base URL
-	let url = '/app/query-report/Supplier%20Quotation%20Comparison?';
+	let url = '/app/query-report/Supplier_Quotation_Comparison?';
 
 	// Add filters
 	url += `company=${encodeURIComponent(company)}`;
 	url += `&from_date=${fromDate}`;
 	url += `&to_date=${today}`;
-	url += `&categorize_by=${encodeURIComponent('Categorize by Supplier')}`;
 
 	// Add RFQ filter if provided
 	if (rfq_name) {
@@ -1035,6 +1037,10 @@ function show_item_selection_dialog_content(frm, items) {
 				},
 			});
 		},
+		secondary_action_label: __('Auto-select Best Offers'),
+		secondary_action: function () {
+			auto_select_best_offers(frm, d);
+		},
 	});
 
 	d.show();
@@ -1046,6 +1052,65 @@ function show_item_selection_dialog_content(frm, items) {
 	setup_item_selection_checkboxes(d, items.length);
 }
 
+// Pick the best valid offer per item on the server and apply all picks at once
+function auto_select_best_offers(frm, dialog) {
+	frappe.prompt(
+		[
+			{
+				fieldname: 'policy',
+				label: __('Pick'),
+				fieldtype: 'Select',
+				options: [
+					{ value: 'lowest_landed_rate', label: __('Lowest Landed Rate') },
+					{ value: 'earliest_delivery', label: __('Earliest Delivery') },
+				],
+				default: 'lowest_landed_rate',
+				reqd: 1,
+			},
+		],
+		(values) => {
+			frappe.call({
+				method: 'power_app.quotation.auto_select_supplier_quotation_items',
+				args: {
+					quotation_name: frm.doc.name,
+					policy: values.policy,
+				},
+				freeze: true,
+				freeze_message: __('Selecting best offers...'),
+				callback: function (r) {
+					if (!r.message) return;
+
+					const summary = r.message;
+					let message = __('{0} item(s) updated, {1} added', [
+						summary.items_updated,
+						summary.items_added,
+					]);
+					if (summary.expired) {
+						message += '<br>' + __('{0} expired offer(s) skipped', [summary.expired]);
+					}
+					if (summary.items_without_offer.length) {
+						message +=
+							'<br>' +
+							__('No valid offer for: {0}', [
+								frappe.utils.escape_html(summary.items_without_offer.join(', ')),
+							]);
+					}
+
+					frappe.msgprint({
+						title: __('Best Offers Selected'),
+						message: message,
+						indicator: 'green',
+					});
+					dialog.hide();
+					frm.reload_doc();
+				},
+			});
+		},
+		__('Auto-select Best Offers'),
+		__('Select'),
+	);
+}
+
 // Function to setup checkboxes and select all functionality (Step 5)
 function setup_item_selection_checkboxes(dialog, totalItems) {
 	// Wait for dialog to be fully rendered
@@ -0,0 +1,165 @@
+// Extends ERPNext's Quotation list view settings
+frappe.listview_settings['Quotation'] = frappe.listview_settings['Quotation'] || {};
+
+(function (settings) {
+	const erpnext_onload = settings.onload;
+
+	settings.onload = function (listview) {
+		if (erpnext_onload) {
+			erpnext_onload(listview);
+		}
+
+		add_bulk_material_request_action(listview);
+		add_bulk_sales_order_action(listview);
+	};
+})(frappe.listview_settings['Quotation']);
+
+// Function to add the "Create Material Requests" bulk action
+function add_bulk_material_request_action(listview) {
+	listview.page.add_actions_menu_item(__('Create Material Requests'), function () {
+		const quotations = listview.get_checked_items(true);
+		if (!quotations.length) {
+			frappe.msgprint(__('Please select at least one Quotation'));
+			return;
+		}
+
+		frappe.prompt(
+			[
+				{
+					fieldname: 'aggregate',
+					fieldtype: 'Check',
+					label: __('Merge duplicate item lines (same item, UOM and warehouse)'),
+				},
+			],
+			function (values) {
+				frappe.call({
+					method: 'power_app.material_request.make_material_requests_for_quotations',
+					args: { quotations: quotations, aggregate: values.aggregate },
+					freeze: true,
+					callback: function (r) {
+						if (!r.exc && r.message) {
+							listview.clear_checked_items();
+							frappe.show_alert(
+								{
+									message: __('Material Request creation queued'),
+									indicator: 'blue',
+								},
+								5,
+							);
+						}
+					},
+				});
+			},
+			__('Create Material Requests for {0} Quotations', [quotations.length]),
+			__('Create'),
+		);
+	});
+
+	// Progress is published by power_app.material_request.create_material_requests_for_quotations
+	frappe.realtime.off('power_app_bulk_material_request');
+	frappe.realtime.on('power_app_bulk_material_request', function (data) {
+		if (!data.done) {
+			frappe.show_progress(
+				__('Creating Material Requests'),
+				data.processed,
+				data.total,
+				__('{0} of {1} Quotations processed', [data.processed, data.total]),
+			);
+			return;
+		}
+
+		frappe.hide_progress();
+		frappe.msgprint({
+			title: __('Material Requests'),
+			message: __('Created: {0}, skipped (already have one): {1}, failed: {2}', [
+				data.created,
+				data.skipped,
+				data.failed,
+			]),
+			indicator: data.failed ? 'orange' : 'green',
+		});
+		listview.refresh();
+	});
+}
+
+// Function to add the "Create Sales Orders" bulk action
+function add_bulk_sales_order_action(listview) {
+	listview.page.add_actions_menu_item(__('Create Sales Orders'), function () {
+		const quotations = listview.get_checked_items(true);
+		if (!quotations.length) {
+			frappe.msgprint(__('Please select at least one Quotation'));
+			return;
+		}
+
+		frappe.prompt(
+			[
+				{
+					fieldname: 'delivery_date',
+					fieldtype: 'Date',
+					label: __('Delivery Date'),
+					description: __('Used for Sales Orders and items without a Delivery Date'),
+				},
+			],
+			function (values) {
+				frappe.call({
+					method: 'power_app.quotation_mapper.make_sales_orders',
+					args: { quotations: quotations, delivery_date: values.delivery_date },
+					freeze: true,
+					callback: function (r) {
+						if (!r.exc && r.message) {
+							listview.clear_checked_items();
+							frappe.show_alert(
+								{
+									message: __('Sales Order creation queued in {0} jobs', [
+										r.message.chunks,
+									]),
+									indicator: 'blue',
+								},
+								5,
+							);
+						}
+					},
+				});
+			},
+			__('Create Sales Orders for {0} Quotations', [quotations.length]),
+			__('Create'),
+		);
+	});
+
+	// Progress is published by power_app.quotation_mapper.make_sales_orders_for_chunk
+	frappe.realtime.off('power_app_bulk_sales_order');
+	frappe.realtime.on('power_app_bulk_sales_order', function (data) {
+		if (!data.done) {
+			frappe.show_progress(
+				__('Creating Sales Orders'),
+				data.processed,
+				data.total,
+				__('{0} of {1} Quotations processed', [data.processed, data.total]),
+			);
+			return;
+		}
+
+		frappe.hide_progress();
+
+		const failed = Object.keys(data.failed);
+		let message = __('Created: {0}, failed: {1}, time: {2}s', [
+			Object.keys(data.created).length,
+			failed.length,
+			data.timings.elapsed,
+		]);
+		if (failed.length) {
+			message +=
+				'<br><br>' +
+				failed
+					.map((name) => `<b>${frappe.utils.escape_html(name)}</b>: ${frappe.utils.escape_html(data.failed[name])}`)
+					.join('<br>');
+		}
+
+		frappe.msgprint({
+			title: __('Sales Orders'),
+			message: message,
+			indicator: failed.length ? 'orange' : 'green',
+		});
+		listview.refresh();
+	});
+}
@@ -1,4 +1,7 @@
 frappe.ui.form.on('Sales Order', {
+	refresh(frm) {
+		add_retry_service_expense_je_button(frm);
+	},
 	transaction_date: function (frm) {
 		// When transaction_date changes, update first payment_schedule row due_date
 		if (frm.doc.payment_schedule && frm.doc.payment_schedule.length > 0) {
@@ -146,3 +149,33 @@ frappe.ui.form.on('Payment Schedule', {
 		}
 	},
 });
+
+// Retry button for service expense Journal Entries posted in the background
+function add_retry_service_expense_je_button(frm) {
+	if (frm.doc.docstatus !== 1 || frm.doc.custom_service_expense_je_status !== 'Failed') {
+		return;
+	}
+
+	frm.dashboard.set_headline(
+		__('Service expense Journal Entry failed. Check the Error Log and retry.'),
+		'red',
+	);
+	frm.add_custom_button(__('Retry Service Expense Journal Entry'), function () {
+		frappe.call({
+			method: 'power_app.sales_order.retry_service_expense_journal_entry',
+			args: {
+				sales_order: frm.doc.name,
+			},
+			freeze: true,
+			callback: function (r) {
+				if (!r.exc) {
+					frappe.show_alert(
+						{ message: __('Journal Entry queued'), indicator: 'blue' },
+						5,
+					);
+					frm.reload_doc();
+				}
+			},
+		});
+	});
+}
@@ -134,6 +134,22 @@ function update_quotation(frm, q) {
 						if (r.message) {
 							console.log(
 								`[supplier_quotation.js] (Quotation updated successfully)`,
+								r.message,
+							);
+							frappe.show_alert(
+								{
+									message: __(
+										'Quotation {0} updated: {1} added, {2} updated, {3} removed',
+										[
+											r.message.quotation,
+											r.message.inserted,
+											r.message.updated,
+											r.message.deleted,
+										],
+									),
+									indicator: 'green',
+								},
+								5,
 							);
 						}
 					},
@@ -1,9 +1,19 @@
+import json
+
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.model.meta import get_field_precision
+from frappe.query_builder.functions import Count, Min
+from frappe.utils import cint, flt
+
+from power_app.expense_allocation import calculate_item_rates
+from power_app.instrumentation import instrument
+from power_app.offer_selection import LOWEST_LANDED_RATE, select_best_offers
+from power_app.service_expenses import set_expense_row_defaults
 
 
 @frappe.whitelist()
+@instrument()
 def get_supplier_quotation_items(quotation_name):
     """
     Get all items from supplier quotations linked to this customer quotation
@@ -12,62 +22,49 @@ def get_supplier_quotation_items(quotation_name):
     1. Customer Quotation → Material Request (via custom_quotation_refrence)
     2. Material Request → Supplier Quotation Items (via material_request field)
 
+    The chain is kept denormalized in Supplier Offer (power_app.supplier_offers),
+    so this is one range read on its (quotation, item_code, rate) index.
+
     Returns list of supplier quotation items with supplier details
     """
-    # Get Material Request linked to Customer Quotation
-    mr_list = frappe.get_all(
-        "Material Request",
-        filters={"custom_quotation_refrence": quotation_name},
-        fields=["name"]
-    )
-
-    if not mr_list:
-        return []
-
-    mr_names = [mr.name for mr in mr_list]
-
-    # Get all Supplier Quotation Items linked to these Material Requests
-    sq_items = frappe.get_all(
-        "Supplier Quotation Item",
-        filters={
-            "material_request": ["in", mr_names],
-            "docstatus": 1
-        },
-        fields=[
-            "name",
-            "parent as supplier_quotation",
-            "item_code",
-            "item_name",
-            "qty",
-            "uom",
-            "rate",
-            "amount",
-            "material_request"
-        ],
-        order_by="item_code, rate"
+    offer = frappe.qb.DocType("Supplier Offer")
+
+    return (
+        frappe.qb.from_(offer)
+        .select(
+            offer.supplier_quotation_item.as_("name"),
+            offer.supplier_quotation,
+            offer.item_code,
+            offer.item_name,
+            offer.qty,
+            offer.uom,
+            offer.rate,
+            offer.amount,
+            offer.material_request,
+            offer.supplier,
+            offer.supplier_name,
+            offer.valid_till,
+            offer.transaction_date,
+        )
+        .where(offer.quotation == quotation_name)
+        .orderby(offer.item_code)
+        .orderby(offer.rate)
+        .run(as_dict=True)
     )
 
-    if not sq_items:
-        return []
-
-    # Get supplier names and other details from Supplier Quotation
-    for item in sq_items:
-        sq_doc = frappe.get_doc("Supplier Quotation",
-                                item["supplier_quotation"])
-        item["supplier"] = sq_doc.supplier
-        item["supplier_name"] = sq_doc.supplier_name
-        item["valid_till"] = sq_doc.valid_till
-        item["transaction_date"] = sq_doc.transaction_date
-
-    return sq_items
-
 
 @frappe.whitelist()
-def get_material_requests_from_quotation(quotation_name):
+@instrument()
+def get_material_requests_from_quotation(quotation_name, with_totals=0):
     """
     Get all Material Requests linked to Customer Quotation
 
-    Returns list of Material Requests with their details
+    Returns list of Material Requests with their details and procurement
+    progress (rfq_count, supplier_quotation_count, quoted_item_count)
+
+    With with_totals, returns {"material_requests": [...], "totals": {...}}
+    where totals count every RFQ / Supplier Quotation / item once for the
+    whole Quotation (see get_procurement_totals)
     """
     # Get Material Requests linked to Customer Quotation
     mr_list = frappe.get_all(
@@ -77,32 +74,117 @@ def get_material_requests_from_quotation(quotation_name):
     )
 
     if not mr_list:
-        return []
+        return {"material_requests": [], "totals": get_procurement_totals([])} if cint(with_totals) else []
+
+    mr_names = [mr.name for mr in mr_list]
+
+    # RFQ per Material Request (and RFQ count) in one grouped query
+    rfq_item = frappe.qb.DocType("Request for Quotation Item")
+    rfq_data = {
+        row.material_request: row
+        for row in (
+            frappe.qb.from_(rfq_item)
+            .select(
+                rfq_item.material_request,
+                Min(rfq_item.parent).as_("rfq_name"),
+                Count(rfq_item.parent).distinct().as_("rfq_count"),
+            )
+            .where(rfq_item.material_request.isin(mr_names))
+            .groupby(rfq_item.material_request)
+            .run(as_dict=True)
+        )
+    }
+
+    # Submitted Supplier Quotations and quoted items per Material Request
+    sq_item = frappe.qb.DocType("Supplier Quotation Item")
+    sq_data = {
+        row.material_request: row
+        for row in (
+            frappe.qb.from_(sq_item)
+            .select(
+                sq_item.material_request,
+                Count(sq_item.parent).distinct().as_("supplier_quotation_count"),
+                Count(sq_item.item_code).distinct().as_("quoted_item_count"),
+            )
+            .where(
+                sq_item.material_request.isin(mr_names)
+                & (sq_item.docstatus == 1)
+            )
+            .groupby(sq_item.material_request)
+            .run(as_dict=True)
+        )
+    }
 
-    # Get RFQ for each Material Request
     result = []
     for mr in mr_list:
-        # Get Request for Quotation from Material Request Items
-        rfq_items = frappe.get_all(
-            "Request for Quotation Item",
-            filters={"material_request": mr.name},
-            fields=["parent"],
-            limit=1
-        )
+        rfq = rfq_data.get(mr.name) or {}
+        sq = sq_data.get(mr.name) or {}
 
         mr_data = {
             "material_request": mr.name,
             "transaction_date": mr.transaction_date,
             "status": mr.status,
             "material_request_type": mr.material_request_type,
-            "rfq_name": rfq_items[0].parent if rfq_items else None
+            "rfq_name": rfq.get("rfq_name"),
+            "rfq_count": rfq.get("rfq_count") or 0,
+            "supplier_quotation_count": sq.get("supplier_quotation_count") or 0,
+            "quoted_item_count": sq.get("quoted_item_count") or 0,
         }
         result.append(mr_data)
 
+    if cint(with_totals):
+        return {"material_requests": result, "totals": get_procurement_totals(mr_names)}
+
     return result
 
 
+def get_procurement_totals(mr_names):
+    """
+    Distinct RFQs, submitted Supplier Quotations and quoted items over the
+    Material Requests of one Quotation (an RFQ or Supplier Quotation that
+    covers several of them is counted once)
+
+    Returns:
+        dict: {material_request_count, rfq_count, supplier_quotation_count, quoted_item_count}
+    """
+    totals = {
+        "material_request_count": len(mr_names),
+        "rfq_count": 0,
+        "supplier_quotation_count": 0,
+        "quoted_item_count": 0,
+    }
+    if not mr_names:
+        return totals
+
+    rfq_item = frappe.qb.DocType("Request for Quotation Item")
+    totals["rfq_count"] = (
+        frappe.qb.from_(rfq_item)
+        .select(Count(rfq_item.parent).distinct())
+        .where(rfq_item.material_request.isin(mr_names))
+        .run()
+    )[0][0] or 0
+
+    sq_item = frappe.qb.DocType("Supplier Quotation Item")
+    supplier_quotation_count, quoted_item_count = (
+        frappe.qb.from_(sq_item)
+        .select(
+            Count(sq_item.parent).distinct(),
+            Count(sq_item.item_code).distinct(),
+        )
+        .where(
+            sq_item.material_request.isin(mr_names)
+            & (sq_item.docstatus == 1)
+        )
+        .run()
+    )[0]
+    totals["supplier_quotation_count"] = supplier_quotation_count or 0
+    totals["quoted_item_count"] = quoted_item_count or 0
+
+    return totals
+
+
 @frappe.whitelist()
+@instrument()
 def add_items_from_supplier_quotations(quotation_name, selected_items):
     """
     Add selected items from supplier quotations to customer quotation
@@ -121,8 +203,6 @@ def add_items_from_supplier_quotations(quotation_name, selected_items):
     Returns:
     - Updated Quotation document
     """
-    import json
-
     # Parse selected_items if it's a string
     if isinstance(selected_items, str):
         selected_items = json.loads(selected_items)
@@ -137,54 +217,222 @@ def add_items_from_supplier_quotations(quotation_name, selected_items):
     if quotation.docstatus != 0:
         frappe.throw(_("Can only add items to draft quotations"))
 
-    # Process each selected item
+    add_supplier_quotation_items(quotation, selected_items)
+
+    # Save quotation once after all rows are applied
+    quotation.save(ignore_permissions=True)
+
+    return quotation
+
+
+@frappe.whitelist()
+@instrument()
+def auto_select_supplier_quotation_items(quotation_name, policy=LOWEST_LANDED_RATE):
+    """
+    Pick the best valid supplier offer per item and apply all picks at once
+
+    Parameters:
+    - quotation_name (str): Customer Quotation name (draft)
+    - policy (str): "lowest_landed_rate" or "earliest_delivery"
+      (see power_app.offer_selection)
+
+    Rates are applied in the Quotation currency, converted to the UOM of each
+    Quotation row they are written to (the offer UOM for new rows).
+
+    Returns:
+        dict: {selected, items_added, items_updated, expired, items_without_offer}
+    """
+    frappe.has_permission("Quotation", "write", quotation_name, throw=True)
+
+    quotation = frappe.get_doc("Quotation", quotation_name)
+    if quotation.docstatus != 0:
+        frappe.throw(_("Can only add items to draft quotations"))
+
+    selection = select_best_offers(quotation, policy)
+
+    selected_items = []
+    for item_code, offer in selection.picks.items():
+        selected_items.append({
+            "item_id": offer.supplier_quotation_item,
+            "supplier_quotation": offer.supplier_quotation,
+            "item_code": item_code,
+            "rate": flt(offer.stock_rate * (flt(offer.conversion_factor) or 1),
+                        quotation.precision("rate", "items")),
+            # Converted to the UOM of every row the offer is written to
+            "stock_rate": offer.stock_rate,
+            "conversion_factor": offer.conversion_factor,
+            "qty": offer.qty,
+            "uom": offer.uom,
+            "item_name": offer.item_name,
+        })
+
+    items_added = items_updated = 0
+    if selected_items:
+        items_added, items_updated = add_supplier_quotation_items(quotation, selected_items)
+        # Save quotation once after all rows are applied
+        quotation.save(ignore_permissions=True)
+
+    return {
+        "selected": len(selected_items),
+        "items_added": items_added,
+        "items_updated": items_updated,
+        "expired": selection.expired,
+        "items_without_offer": sorted({row.item_code for row in quotation.items} - set(selection.picks)),
+    }
+
+
+def add_supplier_quotation_items(quotation, selected_items):
+    """
+    Validate selected Supplier Quotation Items and apply them to the quotation (no save)
+
+    Returns:
+        tuple: (items_added, items_updated)
+    """
+    # Bulk-load descriptions (Supplier Quotation Item first, Item master as fallback)
+    sq_item_names = list({d.get("item_id") for d in selected_items})
+    item_codes = list({d.get("item_code") for d in selected_items})
+
+    sq_items = frappe.get_all(
+        "Supplier Quotation Item",
+        filters={"name": ["in", sq_item_names]},
+        fields=["name", "description", "material_request_item"],
+    )
+    sq_descriptions = {row.name: row.description for row in sq_items}
+    item_descriptions = dict(frappe.get_all(
+        "Item",
+        filters={"name": ["in", item_codes]},
+        fields=["name", "description"],
+        as_list=True
+    ))
+
+    for name in sq_item_names:
+        if name not in sq_descriptions:
+            frappe.throw(
+                _("Supplier Quotation Item {0} not found").format(name),
+                frappe.DoesNotExistError
+            )
+    for item_code in item_codes:
+        if item_code not in item_descriptions:
+            frappe.throw(
+                _("Item {0} not found").format(item_code),
+                frappe.DoesNotExistError
+            )
+
+    return apply_supplier_quotation_items(
+        quotation, selected_items, sq_descriptions, item_descriptions,
+        get_quotation_rows_by_sq_item(sq_items))
+
+
+def get_quotation_rows_by_sq_item(sq_items):
+    """
+    Quotation Item rows each Supplier Quotation Item was quoted for
+
+    Follows SQ Item material_request_item → Material Request Item
+    custom_quotation_items (set by make_material_request_from_quotation,
+    several rows when duplicate lines were merged).
+
+    Returns:
+        dict: {sq_item_name: [quotation_item_name, ...]}
+    """
+    mr_item_names = {row.material_request_item for row in sq_items if row.get("material_request_item")}
+    if not mr_item_names:
+        return {}
+
+    quotation_items_by_mr_item = {
+        row.name: json.loads(row.custom_quotation_items)
+        for row in frappe.get_all(
+            "Material Request Item",
+            filters={"name": ["in", list(mr_item_names)]},
+            fields=["name", "custom_quotation_items"],
+        )
+        if row.custom_quotation_items
+    }
+
+    return {
+        row.name: quotation_items_by_mr_item[row.material_request_item]
+        for row in sq_items
+        if row.get("material_request_item") in quotation_items_by_mr_item
+    }
+
+
+def apply_supplier_quotation_items(quotation, selected_items, sq_descriptions, item_descriptions,
+                                   quotation_rows_by_sq_item=None):
+    """
+    Apply selected supplier quotation items to the quotation rows (no save)
+
+    Existing rows are matched through the Material Request line the item was
+    quoted for (quotation_rows_by_sq_item, every original line is updated),
+    otherwise by item_code through an index built once (first row per
+    item_code wins). New rows are appended.
+
+    An item with stock_rate (rate per stock unit, see
+    auto_select_supplier_quotation_items) gets stock_rate * conversion_factor
+    of every row it is written to, so rows in different UOMs get their own
+    rate; otherwise rate is written as given.
+
+    Returns:
+        tuple: (items_added, items_updated)
+    """
     items_added = 0
     items_updated = 0
+    rate_precision = quotation.precision("rate", "items")
 
-    for item_data in selected_items:
-        # Get Supplier Quotation Item details
-        sq_item = frappe.get_doc(
-            "Supplier Quotation Item", item_data.get("item_id"))
+    rows_by_name = {}
+    rows_by_item_code = {}
+    for q_item in quotation.items:
+        rows_by_name[q_item.name] = q_item
+        rows_by_item_code.setdefault(q_item.item_code, q_item)
 
-        # Get item details from Item master
-        item_doc = frappe.get_doc("Item", item_data.get("item_code"))
+    for item_data in selected_items:
+        item_code = item_data.get("item_code")
 
-        # Check if item already exists in quotation
-        existing_item = None
-        for q_item in quotation.items:
-            if q_item.item_code == item_data.get("item_code"):
-                existing_item = q_item
-                break
+        # Original Quotation lines of the Material Request line, item_code as fallback
+        existing_items = [
+            rows_by_name[name]
+            for name in (quotation_rows_by_sq_item or {}).get(item_data.get("item_id"), [])
+            if name in rows_by_name and rows_by_name[name].item_code == item_code
+        ]
+        if not existing_items and item_code in rows_by_item_code:
+            existing_items = [rows_by_item_code[item_code]]
 
         # Prepare item data
         supplier_rate = flt(item_data.get("rate"))
+        stock_rate = item_data.get("stock_rate")
         item_qty = flt(item_data.get("qty"))
         item_uom = item_data.get("uom")
         item_name = item_data.get("item_name")
 
-        if existing_item:
-            # Update rate with supplier_rate
-            existing_item.rate = supplier_rate
-            existing_item.net_rate = supplier_rate
-            existing_item.amount = supplier_rate * flt(existing_item.qty)
-            existing_item.net_amount = supplier_rate * flt(existing_item.qty)
-            existing_item.custom_supplier_quotation = item_data.get(
-                "supplier_quotation")
-            # Update custom_supplier_quotation_item_rate
-            if hasattr(existing_item, 'custom_supplier_quotation_item_rate'):
-                existing_item.custom_supplier_quotation_item_rate = supplier_rate
-
-            items_updated += 1
+        if existing_items:
+            for existing_item in existing_items:
+                if stock_rate is not None:
+                    supplier_rate = flt(
+                        flt(stock_rate) * (flt(existing_item.conversion_factor) or 1), rate_precision)
+                # Update rate with supplier_rate
+                existing_item.rate = supplier_rate
+                existing_item.net_rate = supplier_rate
+                existing_item.amount = supplier_rate * flt(existing_item.qty)
+                existing_item.net_amount = supplier_rate * flt(existing_item.qty)
+                existing_item.custom_supplier_quotation = item_data.get(
+                    "supplier_quotation")
+                # Update custom_supplier_quotation_item_rate
+                if hasattr(existing_item, 'custom_supplier_quotation_item_rate'):
+                    existing_item.custom_supplier_quotation_item_rate = supplier_rate
+
+                items_updated += 1
         else:
+            if stock_rate is not None:
+                supplier_rate = flt(
+                    flt(stock_rate) * (flt(item_data.get("conversion_factor")) or 1), rate_precision)
+
             # Add new item
             item_row = {
-                "item_code": item_data.get("item_code"),
+                "item_code": item_code,
                 "item_name": item_name,
                 "qty": item_qty,
                 "uom": item_uom,
                 "rate": supplier_rate,
                 "net_rate": supplier_rate,
-                "description": sq_item.description or item_doc.description,
+                "description": sq_descriptions.get(item_data.get("item_id")) or item_descriptions.get(item_code),
             }
 
             # Add custom fields for supplier quotation tracking
@@ -198,123 +446,200 @@ def add_items_from_supplier_quotations(quotation_name, selected_items):
             item_row["net_amount"] = supplier_rate * item_qty
 
             # Add item to quotation
-            quotation.append("items", item_row)
+            rows_by_item_code[item_code] = quotation.append("items", item_row)
             items_added += 1
 
-    # Save quotation
-    quotation.save(ignore_permissions=True)
-
-    return quotation
+    return items_added, items_updated
 
 
+@instrument()
 def quotation_validate(doc, method):
     """
     Document event handler for Quotation validate
     Handles expense allocation and item rate calculations
 
     Runs before save to ensure calculated rates are saved with the document
+    Calculation is done by get_quotation_rates (shared with preview_quotation_rates)
     """
-    from frappe.utils import flt
-
-    # Step 1: Restore original rates before applying expenses
-    # This ensures that when expenses are deleted/changed, rates return to original
-    for item in doc.items:
-        original_rate = None
-
-        # Step 1: Get original rate
-        # Priority: custom_supplier_quotation_item_rate > price_list_rate > current rate
-        if hasattr(item, 'custom_supplier_quotation_item_rate') and flt(item.custom_supplier_quotation_item_rate) > 0:
-            # Use custom_supplier_quotation_item_rate if available (saved from Supplier Quotation)
-            original_rate = flt(item.custom_supplier_quotation_item_rate)
-        elif flt(item.price_list_rate) > 0:
-            # Use price_list_rate if available
-            original_rate = flt(item.price_list_rate)
-        else:
-            # Fallback to current rate
-            original_rate = flt(item.rate) or 0
-
-        # If custom_supplier_quotation exists but custom_supplier_quotation_item_rate is not set,
-        # try to fetch from Supplier Quotation Item and update the field
-        if hasattr(item, 'custom_supplier_quotation') and item.custom_supplier_quotation:
-            if not hasattr(item, 'custom_supplier_quotation_item_rate') or flt(item.custom_supplier_quotation_item_rate) == 0:
-                try:
-                    sq_items = frappe.get_all(
-                        "Supplier Quotation Item",
-                        filters={
-                            "parent": item.custom_supplier_quotation,
-                            "item_code": item.item_code
-                        },
-                        fields=["rate"],
-                        limit=1
-                    )
-                    if sq_items and flt(sq_items[0].rate) > 0:
-                        # Update custom_supplier_quotation_item_rate field for future use
-                        if hasattr(item, 'custom_supplier_quotation_item_rate'):
-                            item.custom_supplier_quotation_item_rate = flt(
-                                sq_items[0].rate)
-                        # Use this rate if we don't have price_list_rate
-                        if original_rate == 0 or (flt(item.price_list_rate) == 0 and original_rate == flt(item.rate)):
-                            original_rate = flt(sq_items[0].rate)
-                except Exception as e:
-                    pass
-
-        # Restore original rate (only rate field)
-        item.rate = original_rate
+    # Step 1: Fill default_account / company on expense rows
+    set_expense_row_defaults(doc.get("custom_service_expense_table"))
+
+    # Step 2: Calculate supplier rates, total expenses and item rates
+    result = get_quotation_rates(
+        doc.items,
+        doc.get("custom_service_expense_table"),
+        margin=flt(doc.get("custom_item_margin")),
+        precision=doc.items[0].precision("custom_item_expense_amount") if doc.items else None,
+    )
+
+    # Update custom_total_expenses field
+    if hasattr(doc, 'custom_total_expenses'):
+        doc.custom_total_expenses = result.total_expenses
+
+    if not doc.items:
+        return
+
+    # Step 3: Update supplier rate (when fetched), rate (only rate field) and item expense amount
+    for i, supplier_rate, rate, expense_amount in zip(
+        doc.items, result.supplier_rates, result.rates, result.expense_amounts
+    ):
+        if supplier_rate and not flt(i.get("custom_supplier_quotation_item_rate")):
+            i.custom_supplier_quotation_item_rate = supplier_rate
+        i.rate = rate
+        if hasattr(i, 'custom_item_expense_amount'):
+            i.custom_item_expense_amount = expense_amount
+
+
+@frappe.whitelist()
+@instrument()
+def preview_quotation_rates(items, expenses=None, margin=0, currency=None):
+    """
+    Recalculate Quotation item rates without saving (read-only)
+
+    Used by quotation.js for the live preview while expenses, margin or items
+    are edited. Uses the same calculation as quotation_validate.
+
+    Args:
+        items: List (or JSON list) of Quotation Item rows
+            (item_code, qty, rate, price_list_rate, custom_supplier_quotation,
+            custom_supplier_quotation_item_rate)
+        expenses: List (or JSON list) of Service Expense rows (amount)
+        margin: custom_item_margin percentage
+        currency: Quotation currency, for the expense amount precision
+
+    Returns:
+        dict: {
+            total_expenses: total_expenses,
+            items: [{rate, custom_item_expense_amount, custom_supplier_quotation_item_rate}]
+                in the order of the given items
+        }
+    """
+    frappe.has_permission("Quotation", "read", throw=True)
+
+    items = [frappe._dict(row) for row in _parse_rows(items)]
+    expenses = [frappe._dict(row) for row in _parse_rows(expenses)]
+
+    df = frappe.get_meta("Quotation Item").get_field("custom_item_expense_amount")
+    result = get_quotation_rates(
+        items,
+        expenses,
+        margin=flt(margin),
+        precision=get_field_precision(df, currency=currency) if df else None,
+    )
+
+    return {
+        "total_expenses": result.total_expenses,
+        "items": [
+            {
+                "rate": rate,
+                "custom_item_expense_amount": expense_amount,
+                "custom_supplier_quotation_item_rate": supplier_rate,
+            }
+            for supplier_rate, rate, expense_amount in zip(
+                result.supplier_rates, result.rates, result.expense_amounts
+            )
+        ],
+    }
+
+
+def get_quotation_rates(items, expenses, margin=0, precision=None):
+    """
+    Calculate Quotation item rates from item rows and expense rows (no writes)
+
+    1. Supplier rate per row: custom_supplier_quotation_item_rate, or the
+       Supplier Quotation Item rate when custom_supplier_quotation is set
+       but the rate is not
+    2. Total expenses
+    3. Restore original rates, distribute expenses and apply margin
+       (power_app.expense_allocation.calculate_item_rates)
+
+    Returns:
+        frappe._dict: supplier_rates, total_expenses, rates, expense_amounts
+            (lists in item order)
+    """
+    supplier_rates = [flt(item.get("custom_supplier_quotation_item_rate")) for item in items]
+
+    # Step 1: Fetch missing supplier rates from Supplier Quotation Item in one query
+    rows_missing_rate = [
+        idx for idx, item in enumerate(items)
+        if item.get("custom_supplier_quotation") and not supplier_rates[idx]
+    ]
+    if rows_missing_rate:
+        sq_rates = get_supplier_quotation_rates(
+            [(items[idx].custom_supplier_quotation, items[idx].item_code) for idx in rows_missing_rate]
+        )
+        for idx in rows_missing_rate:
+            rate = sq_rates.get((items[idx].custom_supplier_quotation, items[idx].item_code))
+            if flt(rate) > 0:
+                supplier_rates[idx] = flt(rate)
 
     # Step 2: Calculate total expenses
     total_expenses = 0.00
-    if hasattr(doc, 'custom_service_expense_table') and doc.custom_service_expense_table:
-        for i in doc.custom_service_expense_table:
-            total_expenses += flt(i.amount)
+    for expense in expenses or []:
+        total_expenses += flt(expense.get("amount"))
 
-    # Update custom_total_expenses field
-    if hasattr(doc, 'custom_total_expenses'):
-        doc.custom_total_expenses = total_expenses
-
-    # Step 3: Calculate total item amount for expense distribution
-    total_item_amount = 0.00
-    for i in doc.items:
-        total_item_amount += flt(i.rate) * flt(i.qty)
-
-    # Step 4: Distribute expenses to items
-    if total_item_amount != 0 and total_expenses > 0:
-        for i in doc.items:
-            # Calculate expense per unit
-            item_amount = flt(i.rate) * flt(i.qty)
-            expense_per_item = (
-                item_amount / total_item_amount * total_expenses) / flt(i.qty)
-            # Calculate total expense amount for this item
-            expense_amount_for_item = expense_per_item * flt(i.qty)
-
-            # Update rate with expense (only rate field)
-            i.rate = flt(i.rate) + expense_per_item
-
-            # Store expense amount in custom field
-            if hasattr(i, 'custom_item_expense_amount'):
-                i.custom_item_expense_amount = expense_amount_for_item
-    else:
-        # If no expenses, reset custom_item_expense_amount to 0
-        for i in doc.items:
-            if hasattr(i, 'custom_item_expense_amount'):
-                i.custom_item_expense_amount = 0
-
-    # Step 5: Apply margin if exists (AFTER expenses are added)
+    if not items:
+        return frappe._dict(
+            supplier_rates=[], total_expenses=total_expenses, rates=[], expense_amounts=[]
+        )
+
+    # Step 3: Restore original rates, distribute expenses and apply margin
     # Margin is applied on: (Original Rate + Distributed Expenses)
-    if hasattr(doc, 'custom_item_margin') and flt(doc.custom_item_margin) != 0:
-        for i in doc.items:
-            # Get current rate (which already includes expenses from Step 4)
-            # This is: Original Rate + Distributed Expenses
-            rate_after_expenses = flt(i.rate)
+    rates, expense_amounts = calculate_item_rates(
+        supplier_rates=supplier_rates,
+        price_list_rates=[flt(item.get("price_list_rate")) for item in items],
+        rates=[flt(item.get("rate")) for item in items],
+        qtys=[flt(item.get("qty")) for item in items],
+        total_expenses=total_expenses,
+        margin=flt(margin),
+        precision=precision or 2,
+    )
+
+    return frappe._dict(
+        supplier_rates=supplier_rates,
+        total_expenses=total_expenses,
+        rates=rates,
+        expense_amounts=expense_amounts,
+    )
+
+
+def _parse_rows(rows):
+    if isinstance(rows, str):
+        rows = json.loads(rows)
+    return rows or []
+
+
+def get_supplier_quotation_rates(pairs):
+    """
+    Get Supplier Quotation Item rates for (supplier_quotation, item_code) pairs in one query
+
+    Returns:
+        dict: {(supplier_quotation, item_code): rate} - first row (by idx) per pair
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+
+    sq_items = frappe.get_all(
+        "Supplier Quotation Item",
+        filters={
+            "parent": ["in", list({parent for parent, _item_code in pairs})],
+            "item_code": ["in", list({item_code for _parent, item_code in pairs})],
+        },
+        fields=["parent", "item_code", "rate"],
+        order_by="idx asc",
+    )
 
-            # Calculate margin amount based on rate AFTER expenses
-            margin_amount = rate_after_expenses * \
-                flt(doc.custom_item_margin) / 100
-            # Final rate = Original + Expenses + Margin (only rate field)
-            i.rate = rate_after_expenses + margin_amount
+    rates = {}
+    for row in sq_items:
+        key = (row.parent, row.item_code)
+        if key in pairs:
+            rates.setdefault(key, row.rate)
 
-    # Rates updated - no logging needed
+    return rates
 
 
+@instrument()
 def quotation_before_submit(doc, method):
     """
     Document event handler for Quotation before_submit
@@ -3,13 +3,34 @@
 
 """
 Override make_sales_order to copy expenses table from Quotation to Sales Order
+
+Bulk conversion (make_sales_orders) splits the Quotations into chunks that
+run as separate background jobs; each chunk stores its result in one Redis
+hash per batch, read back by get_bulk_sales_order_status.
 """
 
+import json
+import time
+
 import frappe
+from frappe import _
 from frappe.model.mapper import get_mapped_doc
+from frappe.utils import now_datetime, strip_html
+
+from power_app.instrumentation import instrument
+from power_app.service_expenses import copy_quotation_expenses
+
+BULK_SALES_ORDER_QUEUE = "long"
+BULK_SALES_ORDER_CHUNK_SIZE = 25
+# One hash per batch: "meta" + one field per chunk
+BULK_SALES_ORDER_CACHE_KEY = "power_app:bulk_sales_order:{0}"
+BULK_SALES_ORDER_CACHE_TTL = 7 * 24 * 60 * 60
+# Realtime event for the Quotation list view (quotation_list.js)
+BULK_SALES_ORDER_EVENT = "power_app_bulk_sales_order"
 
 
 @frappe.whitelist()
+@instrument()
 def make_sales_order(source_name: str, target_doc=None, args=None):
     """
     Override make_sales_order to copy expenses table
@@ -25,7 +46,6 @@ def _make_sales_order(source_name, target_doc=None, ignore_permissions=False, ar
     if args is None:
         args = {}
     if isinstance(args, str):
-        import json
         args = json.loads(args)
 
     from erpnext.selling.doctype.quotation.quotation import _make_customer, get_ordered_items
@@ -72,35 +92,8 @@ def _make_sales_order(source_name, target_doc=None, ignore_permissions=False, ar
         target.run_method("calculate_taxes_and_totals")
 
         # Copy expenses table from Quotation to Sales Order
-        # Only copy if source has rows and target table is empty (prevent duplicates on re-mapping)
-        source_field = "custom_service_expense_table"
-        target_field_candidates = [
-            "custom_service_expense_table",
-            "custom_sales_order_service_expenses_table",
-        ]
-
-        target_field = next(
-            (fieldname for fieldname in target_field_candidates if target.meta.has_field(
-                fieldname)),
-            None,
-        )
-
-        if source.meta.has_field(source_field) and target_field:
-            source_rows = source.get(source_field) or []
-            if source_rows:
-                if not target.get(target_field):
-                    for expense in source_rows:
-                        target.append(
-                            target_field,
-                            {
-                                "service_expense_type": expense.service_expense_type,
-                                "company": expense.company,
-                                "default_account": expense.default_account,
-                                "amount": expense.amount,
-                            },
-                        )
-                else:
-                    pass
+        # Only copies if the target table is empty (prevent duplicates on re-mapping)
+        copy_quotation_expenses(target, expense_rows=source.get("custom_service_expense_table") or [])
 
     def update_item(obj, target, source_parent):
         balance_qty = obj.qty if is_unit_price_row(
@@ -158,3 +151,179 @@ def _make_sales_order(source_name, target_doc=None, ignore_permissions=False, ar
     )
 
     return doclist
+
+
+@frappe.whitelist()
+@instrument()
+def make_sales_orders(quotations, delivery_date=None, chunk_size=BULK_SALES_ORDER_CHUNK_SIZE):
+    """
+    Convert many submitted Quotations to draft Sales Orders in background jobs
+
+    The Quotations are split into chunks, each chunk is its own job so
+    several workers can process a batch in parallel.
+
+    Args:
+        quotations: List (or JSON list) of Quotation names
+        delivery_date: Delivery Date set on the Sales Orders and items that have none
+        chunk_size: Quotations per job
+
+    Returns:
+        dict: {batch_id, total, chunks}
+    """
+    if isinstance(quotations, str):
+        quotations = json.loads(quotations)
+
+    quotations = [name for name in dict.fromkeys(quotations or []) if name]
+    if not quotations:
+        frappe.throw(_("No Quotations selected"))
+
+    frappe.has_permission("Sales Order", "create", throw=True)
+
+    chunk_size = max(int(chunk_size), 1)
+    chunks = [quotations[start:start + chunk_size] for start in range(0, len(quotations), chunk_size)]
+
+    batch_id = frappe.generate_hash(length=10)
+    cache_key = BULK_SALES_ORDER_CACHE_KEY.format(batch_id)
+    frappe.cache.hset(cache_key, "meta", {
+        "total": len(quotations),
+        "chunks": len(chunks),
+        "user": frappe.session.user,
+        "delivery_date": delivery_date,
+        "enqueued_at": now_datetime(),
+    })
+    frappe.cache.expire(frappe.cache.make_key(cache_key), BULK_SALES_ORDER_CACHE_TTL)
+
+    for chunk_no, chunk in enumerate(chunks):
+        frappe.enqueue(
+            "power_app.quotation_mapper.make_sales_orders_for_chunk",
+            queue=BULK_SALES_ORDER_QUEUE,
+            enqueue_after_commit=True,
+            batch_id=batch_id,
+            chunk_no=chunk_no,
+            quotations=chunk,
+            delivery_date=delivery_date,
+        )
+
+    return {"batch_id": batch_id, "total": len(quotations), "chunks": len(chunks)}
+
+
+@instrument()
+def make_sales_orders_for_chunk(batch_id, chunk_no, quotations, delivery_date=None):
+    """
+    Background job: create draft Sales Orders for one chunk of a bulk batch
+
+    Failures are collected per Quotation (Error Log + message) without
+    stopping the chunk; all Sales Orders of the chunk are committed together.
+    """
+    started = time.monotonic()
+    result = {"created": {}, "failed": {}, "timings": {}}
+
+    for quotation in quotations:
+        quotation_started = time.monotonic()
+
+        # A failing Quotation must not undo the rest of the chunk
+        frappe.db.savepoint("bulk_sales_order")
+        try:
+            sales_order = insert_sales_order(quotation, delivery_date)
+        except Exception as e:
+            frappe.db.rollback(save_point="bulk_sales_order")
+            frappe.log_error(
+                title=_("Sales Order creation failed for Quotation {0}").format(quotation),
+                reference_doctype="Quotation",
+                reference_name=quotation,
+            )
+            result["failed"][quotation] = strip_html(str(e)) or e.__class__.__name__
+        else:
+            result["created"][quotation] = sales_order.name
+
+        result["timings"][quotation] = round(time.monotonic() - quotation_started, 3)
+
+    frappe.db.commit()
+
+    result["elapsed"] = round(time.monotonic() - started, 3)
+    result["finished_at"] = now_datetime()
+    frappe.cache.hset(BULK_SALES_ORDER_CACHE_KEY.format(batch_id), f"chunk:{chunk_no}", result)
+
+    status = _get_bulk_sales_order_status(batch_id)
+    frappe.publish_realtime(BULK_SALES_ORDER_EVENT, status, user=status["user"])
+
+    return result
+
+
+def insert_sales_order(quotation, delivery_date=None):
+    """
+    Create and insert the draft Sales Order of one Quotation (no commit)
+    """
+    sales_order = _make_sales_order(quotation, ignore_permissions=True)
+    if delivery_date:
+        set_delivery_date(sales_order, delivery_date)
+    sales_order.flags.ignore_permissions = True
+    sales_order.insert()
+    return sales_order
+
+
+def set_delivery_date(sales_order, delivery_date):
+    if not sales_order.delivery_date:
+        sales_order.delivery_date = delivery_date
+    for item in sales_order.items:
+        if not item.delivery_date:
+            item.delivery_date = delivery_date
+
+
+@frappe.whitelist()
+@instrument()
+def get_bulk_sales_order_status(batch_id):
+    """
+    Summary of a bulk Sales Order batch (only for the user who started it)
+    """
+    status = _get_bulk_sales_order_status(batch_id)
+    if status["user"] != frappe.session.user and frappe.session.user != "Administrator":
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+    return status
+
+
+def _get_bulk_sales_order_status(batch_id):
+    """
+    Summary of a bulk Sales Order batch
+
+    Returns:
+        dict: {
+            batch_id, user, total, processed, done,
+            created: {quotation: sales_order}, failed: {quotation: error},
+            timings: {elapsed, per_quotation_avg, slowest_chunk}
+        }
+    """
+    batch = frappe.cache.hgetall(BULK_SALES_ORDER_CACHE_KEY.format(batch_id)) or {}
+    meta = batch.get("meta")
+    if not meta:
+        frappe.throw(_("Bulk Sales Order batch {0} not found").format(batch_id))
+
+    chunks = [value for field, value in batch.items() if field.startswith("chunk:")]
+
+    created, failed, quotation_timings = {}, {}, []
+    for chunk in chunks:
+        created.update(chunk["created"])
+        failed.update(chunk["failed"])
+        quotation_timings.extend(chunk["timings"].values())
+
+    done = len(chunks) == meta["chunks"]
+    last_finished = max((chunk["finished_at"] for chunk in chunks), default=None)
+
+    return {
+        "batch_id": batch_id,
+        "user": meta["user"],
+        "total": meta["total"],
+        "processed": len(created) + len(failed),
+        "done": done,
+        "created": created,
+        "failed": failed,
+        "timings": {
+            # Enqueue to last finished chunk, including queue wait
+            "elapsed": round((last_finished - meta["enqueued_at"]).total_seconds(), 3)
+            if last_finished else None,
+            "per_quotation_avg": round(sum(quotation_timings) / len(quotation_timings), 3)
+            if quotation_timings else None,
+            "slowest_chunk": max((chunk["elapsed"] for chunk in chunks), default=None),
+        },
+    }
@@ -3,36 +3,71 @@ from frappe import _
 from frappe.utils import flt
 from collections import defaultdict
 
+from power_app.instrumentation import instrument
+from power_app.service_expenses import (
+    copy_quotation_expenses,
+    get_company_service_expense_account,
+    get_sales_order_expense_field,
+    set_expense_row_defaults,
+)
 
+# Queue used for background service expense Journal Entries
+SERVICE_EXPENSE_JE_QUEUE = "long"
+
+
+@instrument()
 def create_je_from_service_expence(doc, method):
     """
     Document event handler for Sales Order on_submit
     Creates Journal Entry automatically when Sales Order with custom service expenses is submitted
+
+    If the Company has custom_post_service_expense_je_in_background checked, the
+    Journal Entry is created by a background job (see post_service_expense_journal_entry)
+    and custom_service_expense_je_status shows Pending / Posted / Failed
     """
-    expenses_field_candidates = [
-        "custom_service_expense_table",
-        "custom_sales_order_service_expenses_table",
-    ]
-    expenses_field = next(
-        (fieldname for fieldname in expenses_field_candidates if doc.meta.has_field(fieldname)),
-        None,
-    )
-    expenses_rows = doc.get(expenses_field) if expenses_field else None
-    if not expenses_rows:
+    if not get_grouped_service_expenses(doc):
+        return  # No entries to process
+
+    # Fail early on a missing credit account, also in background mode
+    get_service_expense_credit_account(doc.company)
+
+    if frappe.get_cached_value("Company", doc.company, "custom_post_service_expense_je_in_background"):
+        doc.db_set("custom_service_expense_je_status", "Pending")
+        enqueue_service_expense_journal_entry(doc.name)
         return
 
-    company = doc.company
+    make_service_expense_journal_entry(doc)
 
-    # Get the default service expense account from the Company master
-    default_credit_account = frappe.db.get_value(
-        "Company", company, "custom_default_service_expense_account"
-    )
 
-    # If not set, use default_expense_account as fallback
-    if not default_credit_account:
-        default_credit_account = frappe.db.get_value(
-            "Company", company, "default_expense_account"
-        )
+def get_grouped_service_expenses(doc):
+    """
+    Group expenses from the Sales Order expense table by their respective expense account
+
+    Returns:
+        dict: {expense_account: amount}
+    """
+    expenses_field = get_sales_order_expense_field(doc)
+    expenses_rows = doc.get(expenses_field) if expenses_field else None
+
+    # Rows saved without default_account get it from the Service Expense Type
+    set_expense_row_defaults(expenses_rows)
+
+    grouped_expenses = defaultdict(float)
+    for row in expenses_rows or []:
+        expense_account = row.default_account
+        amount = flt(row.amount)
+        if expense_account and amount > 0:
+            grouped_expenses[expense_account] += amount
+
+    return grouped_expenses
+
+
+def get_service_expense_credit_account(company):
+    """
+    Get the default service expense account from the Company master
+    Falls back to default_expense_account (resolved and cached by power_app.service_expenses)
+    """
+    default_credit_account = get_company_service_expense_account(company)
 
     # If still not set, throw error
     if not default_credit_account:
@@ -41,16 +76,31 @@ def create_je_from_service_expence(doc, method):
                 company)
         )
 
-    # Group expenses from the child table by their respective expense account
-    grouped_expenses = defaultdict(float)
-    for row in expenses_rows:
-        expense_account = row.default_account
-        amount = flt(row.amount)
-        if expense_account and amount > 0:
-            grouped_expenses[expense_account] += amount
+    return default_credit_account
+
+
+def make_service_expense_journal_entry(doc):
+    """
+    Create and submit the service expense Journal Entry for a submitted Sales Order
+
+    Idempotent per Sales Order: the Sales Order name is the idempotency key
+    (Journal Entry custom_sales_order_refrence), an already submitted Journal
+    Entry is reused instead of posting a second one.
+
+    Returns:
+        str: Journal Entry name, or None if there is nothing to post
+    """
+    existing_je = get_service_expense_journal_entry(doc.name)
+    if existing_je:
+        set_service_expense_je_status(doc, "Posted", existing_je)
+        return existing_je
 
+    grouped_expenses = get_grouped_service_expenses(doc)
     if not grouped_expenses:
-        return  # No entries to process
+        return None  # No entries to process
+
+    company = doc.company
+    default_credit_account = get_service_expense_credit_account(company)
 
     # Create the Journal Entry document
     je = frappe.new_doc("Journal Entry")
@@ -90,71 +140,113 @@ def create_je_from_service_expence(doc, method):
     je.insert(ignore_permissions=True)
     je.submit()
 
+    set_service_expense_je_status(doc, "Posted", je.name)
+    return je.name
+
+
+def get_service_expense_journal_entry(sales_order):
+    """Submitted service expense Journal Entry of a Sales Order, if any"""
+    return frappe.db.get_value(
+        "Journal Entry",
+        {
+            "custom_created_from_doctype": "Sales Order",
+            "custom_sales_order_refrence": sales_order,
+            "docstatus": 1,
+        },
+        "name",
+    )
+
+
+def set_service_expense_je_status(doc, status, journal_entry=None):
+    if not doc.meta.has_field("custom_service_expense_je_status"):
+        return
+
+    doc.db_set({
+        "custom_service_expense_je_status": status,
+        "custom_service_expense_journal_entry": journal_entry,
+    })
+
+
+def enqueue_service_expense_journal_entry(sales_order):
+    """
+    Enqueue Journal Entry creation on the service expense queue
+    The job id makes retries of the same Sales Order collapse into one job
+    """
+    frappe.enqueue(
+        "power_app.sales_order.post_service_expense_journal_entry",
+        queue=SERVICE_EXPENSE_JE_QUEUE,
+        job_id=f"power_app:service_expense_je:{sales_order}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        sales_order=sales_order,
+    )
+
+
+@instrument()
+def post_service_expense_journal_entry(sales_order):
+    """
+    Background job: create the service expense Journal Entry for a Sales Order
+    Sets custom_service_expense_je_status to Posted, or Failed with an Error Log
+    """
+    # Lock the Sales Order row so parallel retries cannot both post
+    doc = frappe.get_doc("Sales Order", sales_order, for_update=True)
+    if doc.docstatus != 1:
+        return
+
+    try:
+        make_service_expense_journal_entry(doc)
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(
+            title=_("Service expense Journal Entry failed for Sales Order {0}").format(sales_order),
+            reference_doctype="Sales Order",
+            reference_name=sales_order,
+        )
+        frappe.db.set_value(
+            "Sales Order", sales_order, "custom_service_expense_je_status", "Failed"
+        )
+
+
+@frappe.whitelist()
+@instrument()
+def retry_service_expense_journal_entry(sales_order):
+    """
+    Re-enqueue the service expense Journal Entry of a submitted Sales Order
+    """
+    doc = frappe.get_doc("Sales Order", sales_order)
+    doc.check_permission("submit")
+
+    if doc.docstatus != 1:
+        frappe.throw(_("Sales Order {0} is not submitted").format(sales_order))
+    if doc.get("custom_service_expense_je_status") == "Posted":
+        frappe.throw(
+            _("Service expense Journal Entry is already posted for Sales Order {0}").format(
+                sales_order)
+        )
+
+    doc.db_set("custom_service_expense_je_status", "Pending")
+    enqueue_service_expense_journal_entry(sales_order)
+
 
 def copy_quotation_expenses_to_sales_order(doc, method):
     """
     Document event handler for Sales Order before_save
-    Copies custom_service_expense_table from Quotation to Sales Order custom_sales_order_service_expenses_table
+    Copies custom_service_expense_table from Quotation to the Sales Order expense table
     Uses mapper hook approach - extends without overriding
+
+    Source Quotation comes from prevdoc_docname; only its Service Expense
+    rows are read (see power_app.service_expenses.copy_quotation_expenses)
     """
     # Check if expenses already copied (avoid duplicate on save)
-    if hasattr(doc, '_quotation_expenses_copied'):
+    if doc.flags.quotation_expenses_copied:
         return
 
-    # Get quotation reference - try multiple methods
-    quotation_name = None
-
-    # Method 1: Check if created from Quotation via quotation_to field
-    if hasattr(doc, 'quotation_to') and doc.quotation_to == "Quotation":
-        # Get quotation from items
-        for item in doc.items:
-            if item.quotation_item:
-                quotation_name = frappe.db.get_value(
-                    "Quotation Item", item.quotation_item, "parent"
-                )
-                break
-
-    # Method 2: Get quotation from prevdoc_docname (set by mapper)
-    if not quotation_name and hasattr(doc, 'prevdoc_docname'):
-        quotation_name = doc.prevdoc_docname
-
-    # Method 3: Get quotation from items (quotation_item field)
-    if not quotation_name:
-        for item in doc.items:
-            if item.quotation_item:
-                quotation_name = frappe.db.get_value(
-                    "Quotation Item", item.quotation_item, "parent"
-                )
-                if quotation_name:
-                    break
-
-    if not quotation_name:
-        return
-
-    # Get quotation expenses
-    try:
-        quotation = frappe.get_doc("Quotation", quotation_name)
-        if not hasattr(quotation, 'custom_service_expense_table') or not quotation.custom_service_expense_table:
-            return
-
-        # Copy expenses to Sales Order
-        if not hasattr(doc, 'custom_sales_order_service_expenses_table'):
-            doc.set('custom_sales_order_service_expenses_table', [])
-
-        for expense in quotation.custom_service_expense_table:
-            doc.append('custom_sales_order_service_expenses_table', {
-                'service_expense_type': expense.service_expense_type,
-                'company': expense.company,
-                'default_account': expense.default_account,
-                'amount': expense.amount,
-            })
-
+    if copy_quotation_expenses(doc):
         # Mark as copied to avoid duplicates
-        doc._quotation_expenses_copied = True
-    except Exception as e:
-        pass
+        doc.flags.quotation_expenses_copied = True
 
 
+@instrument()
 def sales_order_validate(doc, method):
     """
     Document event handler for Sales Order validate
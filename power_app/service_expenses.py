@@ -0,0 +1,244 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Shared helpers for Service Expense rows (Quotation, Supplier Quotation, Sales Order)
+
+Account resolution is cached in frappe.cache:
+- Company → service expense credit account
+  (custom_default_service_expense_account, falling back to default_expense_account)
+- Service Expense Type → default_account / company / description
+- Expense Template → its Service Expense rows
+Entries are dropped from Company on_update (hooks.py) and from the
+Service Expense Type / Expense Template controllers
+(on_update / on_trash / after_rename).
+"""
+
+import frappe
+
+COMPANY_ACCOUNT_CACHE_KEY = "power_app:company_service_expense_account"
+EXPENSE_TYPE_CACHE_KEY = "power_app:service_expense_type_defaults"
+EXPENSE_TEMPLATE_CACHE_KEY = "power_app:expense_template_rows"
+
+EXPENSE_ROW_FIELDS = ("service_expense_type", "company", "default_account", "amount", "description")
+
+# Expense table of Quotation / Supplier Quotation
+EXPENSE_TABLE_FIELD = "custom_service_expense_table"
+# Expense table of Sales Order, in order of preference
+SALES_ORDER_EXPENSE_TABLE_FIELDS = (
+    "custom_service_expense_table",
+    "custom_sales_order_service_expenses_table",
+)
+
+
+def get_company_service_expense_account(company):
+    """
+    Service expense credit account of a Company (cached)
+
+    Returns:
+        str: Account name, or None if neither account is set on the Company
+    """
+    if not company:
+        return None
+
+    account = frappe.cache.hget(COMPANY_ACCOUNT_CACHE_KEY, company)
+    if account is None:
+        values = frappe.db.get_value(
+            "Company",
+            company,
+            ["custom_default_service_expense_account", "default_expense_account"],
+            as_dict=True,
+        ) or {}
+        # Cache "not set" as an empty string
+        account = (
+            values.get("custom_default_service_expense_account")
+            or values.get("default_expense_account")
+            or ""
+        )
+        frappe.cache.hset(COMPANY_ACCOUNT_CACHE_KEY, company, account)
+
+    return account or None
+
+
+def get_service_expense_type_defaults(service_expense_types):
+    """
+    default_account / company / description per Service Expense Type (cached)
+
+    Returns:
+        dict: {service_expense_type: {"default_account", "company", "description"}}
+    """
+    defaults = {}
+    missing = []
+    for expense_type in set(service_expense_types):
+        if not expense_type:
+            continue
+        values = frappe.cache.hget(EXPENSE_TYPE_CACHE_KEY, expense_type)
+        if values is None:
+            missing.append(expense_type)
+        else:
+            defaults[expense_type] = values
+
+    if missing:
+        for row in frappe.get_all(
+            "Service Expense Type",
+            filters={"name": ["in", missing]},
+            fields=["name", "default_account", "company", "description"],
+        ):
+            values = {
+                "default_account": row.default_account,
+                "company": row.company,
+                "description": row.description,
+            }
+            frappe.cache.hset(EXPENSE_TYPE_CACHE_KEY, row.name, values)
+            defaults[row.name] = values
+
+    return defaults
+
+
+def get_expense_template_rows(template_names):
+    """
+    Service Expense rows of Expense Templates (cached)
+
+    Templates missing from the cache are loaded with one query on the
+    Service Expense child table.
+
+    Returns:
+        dict: {template_name: [row dicts]}, templates that do not exist are left out
+    """
+    templates = {}
+    missing = []
+    for template_name in dict.fromkeys(template_names):
+        if not template_name:
+            continue
+        rows = frappe.cache.hget(EXPENSE_TEMPLATE_CACHE_KEY, template_name)
+        if rows is None:
+            missing.append(template_name)
+        else:
+            templates[template_name] = rows
+
+    if missing:
+        loaded = {
+            name: [] for name in frappe.get_all(
+                "Expense Template", filters={"name": ["in", missing]}, pluck="name"
+            )
+        }
+        if loaded:
+            for row in frappe.get_all(
+                "Service Expense",
+                filters={
+                    "parenttype": "Expense Template",
+                    "parentfield": "service_expense",
+                    "parent": ["in", list(loaded)],
+                },
+                fields=["parent", *EXPENSE_ROW_FIELDS],
+                order_by="idx",
+            ):
+                loaded[row.parent].append({field: row.get(field) for field in EXPENSE_ROW_FIELDS})
+
+        for template_name, rows in loaded.items():
+            frappe.cache.hset(EXPENSE_TEMPLATE_CACHE_KEY, template_name, rows)
+            templates[template_name] = rows
+
+    return templates
+
+
+def set_expense_row_defaults(rows):
+    """
+    Fill default_account / company on Service Expense rows that miss them,
+    from the cached Service Expense Type mapping (same values as fetch_from)
+    """
+    rows = [
+        row for row in rows or []
+        if row.get("service_expense_type") and not (row.get("default_account") and row.get("company"))
+    ]
+    if not rows:
+        return
+
+    defaults = get_service_expense_type_defaults([row.get("service_expense_type") for row in rows])
+    for row in rows:
+        values = defaults.get(row.get("service_expense_type"))
+        if not values:
+            continue
+        if not row.get("default_account"):
+            row.default_account = values["default_account"]
+        if not row.get("company"):
+            row.company = values["company"]
+
+
+def get_expense_rows(parenttype, parent, parentfield=EXPENSE_TABLE_FIELD):
+    """
+    Service Expense rows of a document, read from the child table only
+
+    Returns:
+        list: frappe._dict rows with EXPENSE_ROW_FIELDS, in idx order
+    """
+    return frappe.get_all(
+        "Service Expense",
+        filters={"parenttype": parenttype, "parent": parent, "parentfield": parentfield},
+        fields=list(EXPENSE_ROW_FIELDS),
+        order_by="idx",
+    )
+
+
+def get_sales_order_expense_field(doc):
+    return next(
+        (fieldname for fieldname in SALES_ORDER_EXPENSE_TABLE_FIELDS if doc.meta.has_field(fieldname)),
+        None,
+    )
+
+
+def get_source_quotation(sales_order):
+    """
+    Quotation a Sales Order was made from (prevdoc_docname set by the mapper)
+    """
+    return next(
+        (item.prevdoc_docname for item in sales_order.get("items") if item.get("prevdoc_docname")),
+        None,
+    )
+
+
+def copy_quotation_expenses(sales_order, quotation=None, expense_rows=None):
+    """
+    Copy Quotation Service Expense rows to the Sales Order expense table
+
+    Only copies into an empty table, so re-mapping or saving again does not
+    duplicate rows. Used by quotation_mapper._make_sales_order (rows already
+    in memory) and sales_order.copy_quotation_expenses_to_sales_order.
+
+    Args:
+        sales_order: Sales Order document
+        quotation: Quotation name (defaults to get_source_quotation)
+        expense_rows: Quotation expense rows, if already loaded (skips the query)
+
+    Returns:
+        int: Number of rows copied
+    """
+    target_field = get_sales_order_expense_field(sales_order)
+    if not target_field or sales_order.get(target_field):
+        return 0
+
+    if expense_rows is None:
+        quotation = quotation or get_source_quotation(sales_order)
+        if not quotation:
+            return 0
+        expense_rows = get_expense_rows("Quotation", quotation)
+
+    for expense in expense_rows:
+        sales_order.append(target_field, {field: expense.get(field) for field in EXPENSE_ROW_FIELDS})
+
+    return len(expense_rows)
+
+
+def clear_company_cache(doc, method=None):
+    """
+    Document event handler for Company on_update / on_trash
+    """
+    frappe.cache.hdel(COMPANY_ACCOUNT_CACHE_KEY, doc.name)
+
+
+def clear_service_expense_type_cache(service_expense_type):
+    frappe.cache.hdel(EXPENSE_TYPE_CACHE_KEY, service_expense_type)
+
+
+def clear_expense_template_cache(template_name):
+    frappe.cache.hdel(EXPENSE_TEMPLATE_CACHE_KEY, template_name)
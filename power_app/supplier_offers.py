@@ -0,0 +1,156 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+"""
+Supplier Offer: denormalized supplier offers per customer Quotation
+
+One row per submitted Supplier Quotation Item whose Material Request is
+linked to a customer Quotation (custom_quotation_refrence), named after the
+Supplier Quotation Item. Rows are kept up to date by doc_events:
+- Supplier Quotation on_submit / on_cancel → update_supplier_offers
+- Material Request on_update → update_material_request_offers
+rebuild_supplier_offers refills the table from scratch
+(bench --site [site] rebuild-supplier-offers, and a post_model_sync patch).
+
+Reads go through the (quotation, item_code, rate) index managed by
+power_app.indexes.
+"""
+
+import frappe
+from frappe.utils import now
+
+from power_app.instrumentation import instrument
+
+OFFER_FIELDS = (
+    "quotation",
+    "item_code",
+    "item_name",
+    "material_request",
+    "supplier",
+    "supplier_name",
+    "supplier_quotation",
+    "supplier_quotation_item",
+    "qty",
+    "uom",
+    "conversion_factor",
+    "currency",
+    "rate",
+    "amount",
+    "base_rate",
+    "transaction_date",
+    "valid_till",
+    "delivery_time",
+)
+
+REBUILD_CHUNK_SIZE = 5000
+
+
+def get_offer_rows(supplier_quotation=None, material_request=None):
+    """
+    Supplier Offer values read from the source chain in one statement
+
+    Args:
+        supplier_quotation: Only rows of this Supplier Quotation
+        material_request: Only rows quoted for this Material Request
+
+    Returns:
+        list: frappe._dict rows with OFFER_FIELDS
+    """
+    conditions = []
+    if supplier_quotation:
+        conditions.append("and sq.name = %(supplier_quotation)s")
+    if material_request:
+        conditions.append("and sq_item.material_request = %(material_request)s")
+
+    return frappe.db.sql(
+        """
+        select
+            mr.custom_quotation_refrence as quotation,
+            sq_item.item_code,
+            sq_item.item_name,
+            sq_item.material_request,
+            sq.supplier,
+            sq.supplier_name,
+            sq.name as supplier_quotation,
+            sq_item.name as supplier_quotation_item,
+            sq_item.qty,
+            sq_item.uom,
+            sq_item.conversion_factor,
+            sq.currency,
+            sq_item.rate,
+            sq_item.amount,
+            sq_item.base_rate,
+            sq.transaction_date,
+            sq.valid_till,
+            sq.custom_delivery_time as delivery_time
+        from `tabSupplier Quotation Item` sq_item
+        inner join `tabSupplier Quotation` sq on sq.name = sq_item.parent
+        inner join `tabMaterial Request` mr on mr.name = sq_item.material_request
+        where sq.docstatus = 1
+            and sq_item.parenttype = 'Supplier Quotation'
+            and ifnull(mr.custom_quotation_refrence, '') != ''
+            {conditions}
+        order by sq.name, sq_item.idx
+        """.format(conditions=" ".join(conditions)),
+        {"supplier_quotation": supplier_quotation, "material_request": material_request},
+        as_dict=True,
+    )
+
+
+def insert_offers(rows):
+    """
+    Bulk insert Supplier Offer rows (rows already in the table are left as they are)
+    """
+    if not rows:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = ["name", "owner", "modified_by", "creation", "modified", "docstatus", *OFFER_FIELDS]
+    values = [
+        (row.supplier_quotation_item, user, user, timestamp, timestamp, 0,
+         *(row.get(field) for field in OFFER_FIELDS))
+        for row in rows
+    ]
+    frappe.db.bulk_insert("Supplier Offer", fields, values, ignore_duplicates=True)
+
+
+@instrument()
+def update_supplier_offers(doc, method=None):
+    """
+    Document event handler for Supplier Quotation on_submit / on_cancel
+    """
+    frappe.db.delete("Supplier Offer", {"supplier_quotation": doc.name})
+    if doc.docstatus == 1:
+        insert_offers(get_offer_rows(supplier_quotation=doc.name))
+
+
+@instrument()
+def update_material_request_offers(doc, method=None):
+    """
+    Document event handler for Material Request on_update
+
+    Offers follow the Material Request when its customer Quotation
+    (custom_quotation_refrence) changes.
+    """
+    if not doc.has_value_changed("custom_quotation_refrence"):
+        return
+
+    frappe.db.delete("Supplier Offer", {"material_request": doc.name})
+    insert_offers(get_offer_rows(material_request=doc.name))
+
+
+def rebuild_supplier_offers():
+    """
+    Refill the Supplier Offer table from all submitted Supplier Quotations
+
+    Returns:
+        int: Number of rows written
+    """
+    frappe.db.delete("Supplier Offer")
+
+    rows = get_offer_rows()
+    for start in range(0, len(rows), REBUILD_CHUNK_SIZE):
+        insert_offers(rows[start:start + REBUILD_CHUNK_SIZE])
+
+    return len(rows)
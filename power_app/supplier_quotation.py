@@ -1,30 +1,73 @@
+import json
+
 import frappe
 from frappe import _
+from frappe.query_builder.functions import IfNull
+from frappe.utils import flt
+
+from power_app.instrumentation import instrument
+from power_app.service_expenses import (
+    EXPENSE_ROW_FIELDS,
+    get_expense_template_rows,
+    set_expense_row_defaults,
+)
+
+# check_quotation_linked answer per Supplier Quotation
+LINKED_QUOTATION_CACHE_KEY = "power_app:sq_linked_quotation:{0}"
+# Safety net for Material Requests relinked to another Quotation
+LINKED_QUOTATION_CACHE_TTL = 24 * 60 * 60
 
 
 @frappe.whitelist()
+@instrument()
 def check_quotation_linked(doc):
     """
     Check if Supplier Quotation is linked to Customer Quotation via Material Request
 
+    Answered with one join query (SQ Item material_request → Material Request
+    custom_quotation_refrence) and cached per Supplier Quotation until it is
+    updated, cancelled or deleted (see clear_linked_quotation_cache)
+
     Returns quotation name if linked, None otherwise
     """
-    sq = frappe.get_doc("Supplier Quotation", doc)
-    mr = ""
-    quotation_name = ""
-
-    for item in sq.items:
-        mr = item.material_request
-        if mr and frappe.db.get_value("Material Request", mr, "custom_quotation_refrence"):
-            quotation_name = frappe.db.get_value(
-                "Material Request", mr, "custom_quotation_refrence"
+    cache_key = LINKED_QUOTATION_CACHE_KEY.format(doc)
+    quotation_name = frappe.cache.get_value(cache_key)
+
+    if quotation_name is None:
+        sq_item = frappe.qb.DocType("Supplier Quotation Item")
+        mr = frappe.qb.DocType("Material Request")
+        result = (
+            frappe.qb.from_(sq_item)
+            .inner_join(mr)
+            .on(mr.name == sq_item.material_request)
+            .select(mr.custom_quotation_refrence)
+            .where(
+                (sq_item.parent == doc)
+                & (sq_item.parenttype == "Supplier Quotation")
+                & (IfNull(mr.custom_quotation_refrence, "") != "")
             )
-            break
+            .orderby(sq_item.idx)
+            .limit(1)
+            .run()
+        )
+        # Cache "not linked" as an empty string
+        quotation_name = result[0][0] if result else ""
+        frappe.cache.set_value(cache_key, quotation_name,
+                               expires_in_sec=LINKED_QUOTATION_CACHE_TTL)
 
     return quotation_name if quotation_name else None
 
 
+def clear_linked_quotation_cache(doc, method=None):
+    """
+    Document event handler for Supplier Quotation on_update, on_cancel and on_trash
+    Drops the cached check_quotation_linked answer for this Supplier Quotation
+    """
+    frappe.cache.delete_value(LINKED_QUOTATION_CACHE_KEY.format(doc.name))
+
+
 @frappe.whitelist()
+@instrument()
 def get_expense_template_data(template_name):
     """
     Fetch expense template data and return service expenses
@@ -38,34 +81,60 @@ def get_expense_template_data(template_name):
     if not template_name:
         return []
 
-    try:
-        template = frappe.get_doc("Expense Template", template_name)
-        expenses = []
-
-        if hasattr(template, 'service_expense') and template.service_expense:
-            for expense in template.service_expense:
-                expenses.append({
-                    'service_expense_type': expense.service_expense_type,
-                    'company': expense.company,
-                    'default_account': expense.default_account,
-                    'amount': expense.amount,
-                    'description': expense.description
-                })
-
-        return expenses
-    except frappe.DoesNotExistError:
-        frappe.throw(_("Expense Template {0} not found").format(template_name))
-        return []
+    return get_expense_templates_data([template_name])[template_name]
 
 
 @frappe.whitelist()
+@instrument()
+def get_expense_templates_data(template_names):
+    """
+    Batch version of get_expense_template_data for bulk tools
+
+    Args:
+        template_names: List (or JSON list) of Expense Template names
+
+    Returns:
+        dict: {template_name: list of service expense dictionaries}
+    """
+    if isinstance(template_names, str):
+        template_names = json.loads(template_names)
+
+    template_names = [name for name in dict.fromkeys(template_names or []) if name]
+    templates = get_expense_template_rows(template_names)
+
+    for template_name in template_names:
+        if template_name not in templates:
+            frappe.throw(_("Expense Template {0} not found").format(template_name))
+
+    data = {}
+    for template_name in template_names:
+        # Copies, so cached rows are not changed by the defaults below
+        expenses = [frappe._dict(row) for row in templates[template_name]]
+
+        # Rows saved before their type had an account get it from the resolver
+        set_expense_row_defaults(expenses)
+        data[template_name] = expenses
+
+    return data
+
+
+@frappe.whitelist()
+@instrument()
 def update_quotation_linked(doc, q):
     """
     Update Customer Quotation with items and rates from Supplier Quotation
 
+    Existing Quotation Items are matched by (item_code, custom_supplier_quotation)
+    and only the fields that differ are updated; unmatched source items are
+    inserted and Quotation Items without a source item are removed.
+    The Quotation is only set back to Draft and saved when something changed.
+
     Args:
         doc: Supplier Quotation document name
         q: Customer Quotation document name
+
+    Returns:
+        dict: {quotation, inserted, updated, deleted, expenses_updated}
     """
     source_supplier_quotation_name = doc
     target_quotation_name = q
@@ -74,9 +143,6 @@ def update_quotation_linked(doc, q):
         frappe.throw(_("No Supplier Quotation specified."))
         return
 
-    # Set Quotation to Draft status
-    frappe.db.set_value("Quotation", target_quotation_name, "docstatus", 0)
-
     try:
         # Load the target Quotation (the document to be updated)
         target_doc = frappe.get_doc("Quotation", target_quotation_name)
@@ -89,79 +155,147 @@ def update_quotation_linked(doc, q):
         frappe.throw(_("Document not found: {0}").format(e))
         return
 
-    # Clear existing items in the target Quotation
-    target_doc.set("items", [])
-
     # ============================================
-    # Function 1: Copy items and prices
+    # Function 1: Sync items and prices
     # Fields: item_code, qty, rate, custom_supplier_quotation_item_rate,
     #        custom_supplier_quotation, margin_type
     # ============================================
-    # Loop through source items and create new rows for the target
-    for source_item in source_doc.items:
-        new_item = frappe.new_doc(
-            "Quotation Item", parent=target_doc, parentfield="items", parenttype="Quotation"
-        )
-
-        # Copy required fields: item_code, qty, rate
-        if hasattr(source_item, "item_code"):
-            new_item.item_code = source_item.item_code
-        if hasattr(source_item, "qty"):
-            new_item.qty = source_item.qty
-        if hasattr(source_item, "rate"):
-            new_item.rate = source_item.rate
-        elif hasattr(source_item, "base_rate"):
-            new_item.rate = source_item.base_rate
-
-        # Copy custom fields: custom_supplier_quotation_item_rate, custom_supplier_quotation
-        if hasattr(source_item, "custom_supplier_quotation_item_rate"):
-            new_item.custom_supplier_quotation_item_rate = source_item.custom_supplier_quotation_item_rate
-        if hasattr(source_item, "custom_supplier_quotation"):
-            new_item.custom_supplier_quotation = source_item.custom_supplier_quotation
-        else:
-            # If custom_supplier_quotation doesn't exist in source item, set it to the Supplier Quotation name
-            new_item.custom_supplier_quotation = source_supplier_quotation_name
-
-        # Copy margin_type if it exists in source
-        if hasattr(source_item, "margin_type"):
-            new_item.margin_type = source_item.margin_type
-
-        # Set the parent link fields before appending
-        new_item.parent = target_doc.name
-        new_item.parenttype = "Quotation"
-        new_item.parentfield = "items"
-
-        target_doc.append("items", new_item)
+    inserted, updated, deleted = sync_quotation_items(
+        target_doc, source_doc.items, source_supplier_quotation_name)
 
     # ============================================
-    # Function 2: Copy expenses table
+    # Function 2: Sync expenses table
     # Copy custom_service_expense_table from Supplier Quotation to Quotation
     # ============================================
-    if hasattr(source_doc, 'custom_service_expense_table') and source_doc.custom_service_expense_table:
-        # Clear existing expenses in target Quotation
-        if hasattr(target_doc, 'custom_service_expense_table'):
-            target_doc.set('custom_service_expense_table', [])
-
-        # Copy expenses from Supplier Quotation to Quotation
-        for expense in source_doc.custom_service_expense_table:
-            target_doc.append('custom_service_expense_table', {
-                'service_expense_type': expense.service_expense_type,
-                'company': expense.company,
-                'default_account': expense.default_account,
-                'amount': expense.amount,
-                'description': expense.description
-            })
+    expenses_updated = sync_quotation_expenses(
+        target_doc, source_doc.get("custom_service_expense_table"))
 
     # Copy custom_expense_template from Supplier Quotation to Quotation
-    if hasattr(source_doc, 'custom_expense_template') and source_doc.custom_expense_template:
+    template_updated = False
+    if source_doc.get("custom_expense_template") \
+            and target_doc.get("custom_expense_template") != source_doc.custom_expense_template:
         target_doc.custom_expense_template = source_doc.custom_expense_template
+        template_updated = True
+
+    # Save the document only if something changed; the Quotation goes back to
+    # Draft only then, so save() resets the child rows' docstatus with it
+    if inserted or updated or deleted or expenses_updated or template_updated:
+        frappe.db.set_value(
+            "Quotation", target_quotation_name, "docstatus", 0, update_modified=False)
+        target_doc.docstatus = 0
+        target_doc.save(ignore_permissions=True)
+
+    return {
+        "quotation": target_doc.name,
+        "inserted": inserted,
+        "updated": updated,
+        "deleted": deleted,
+        "expenses_updated": expenses_updated,
+    }
+
+
+def sync_quotation_items(target_doc, source_items, supplier_quotation):
+    """
+    Diff Quotation Items against Supplier Quotation Items in place
+
+    Rows are matched by (item_code, custom_supplier_quotation); repeated
+    items are paired in row order.
+
+    Returns:
+        tuple: (inserted, updated, deleted) row counts
+    """
+    # Existing rows per key, in row order
+    existing_rows = {}
+    for row in target_doc.get("items"):
+        existing_rows.setdefault((row.item_code, row.custom_supplier_quotation), []).append(row)
+
+    inserted = updated = 0
+    for source_item in source_items:
+        source_rate = flt(source_item.rate)
+        values = {
+            "qty": flt(source_item.qty),
+            # Same value quotation_validate would fetch for the row
+            "custom_supplier_quotation_item_rate": source_rate,
+        }
+        if source_item.get("margin_type"):
+            values["margin_type"] = source_item.margin_type
+
+        key = (source_item.item_code, supplier_quotation)
+        rows = existing_rows.get(key)
+        if rows:
+            row = rows.pop(0)
+
+            changed = {
+                fieldname: value for fieldname, value in values.items()
+                if row.get(fieldname) != value
+            }
+            if not changed:
+                continue
+            if "custom_supplier_quotation_item_rate" in changed:
+                changed["rate"] = source_rate
+
+            row.update(changed)
+            updated += 1
+        else:
+            target_doc.append("items", {
+                "item_code": source_item.item_code,
+                "rate": source_rate,
+                "custom_supplier_quotation": supplier_quotation,
+                **values,
+            })
+            inserted += 1
+
+    # Rows left unmatched have no source item anymore
+    obsolete_rows = [row for rows in existing_rows.values() for row in rows]
+    for row in obsolete_rows:
+        target_doc.remove(row)
 
-    # Save the document
-    target_doc.save(ignore_permissions=True)
+    if obsolete_rows:
+        for idx, row in enumerate(target_doc.get("items"), start=1):
+            row.idx = idx
 
-    return target_doc
+    return inserted, updated, len(obsolete_rows)
+
+
+def sync_quotation_expenses(target_doc, source_expenses):
+    """
+    Replace the Quotation expense table with the Supplier Quotation rows,
+    only if they differ
+
+    Returns:
+        bool: True if the expense table was rewritten
+    """
+    if not source_expenses:
+        return False
+
+    fields = EXPENSE_ROW_FIELDS
+
+    def as_tuples(rows):
+        return [
+            tuple(flt(row.get(f)) if f == "amount" else (row.get(f) or None) for f in fields)
+            for row in rows or []
+        ]
+
+    if as_tuples(target_doc.get("custom_service_expense_table")) == as_tuples(source_expenses):
+        return False
+
+    target_doc.set("custom_service_expense_table", [])
+    for expense in source_expenses:
+        target_doc.append("custom_service_expense_table", {f: expense.get(f) for f in fields})
+
+    return True
+
+
+@instrument()
+def supplier_quotation_validate(doc, method):
+    """
+    Document event handler for Supplier Quotation validate
+    Fills default_account / company on expense rows from the cached Service Expense Type mapping
+    """
+    set_expense_row_defaults(doc.get("custom_service_expense_table"))
 
 
+@instrument()
 def supplier_quotation_before_submit(doc, method):
     """
     Document event handler for Supplier Quotation before_submit
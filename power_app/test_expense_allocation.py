@@ -0,0 +1,78 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+import random
+import unittest
+from unittest.mock import patch
+
+from frappe.tests.utils import FrappeTestCase
+
+from power_app import expense_allocation
+from power_app.expense_allocation import allocate_largest_remainder, calculate_item_rates
+
+
+def to_units(values, precision=2):
+    return sum(int(round(value * 10 ** precision)) for value in values)
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return (
+        [rng.choice([0, round(rng.uniform(1, 500), 2)]) for _ in range(count)],
+        [rng.choice([0, round(rng.uniform(1, 500), 2)]) for _ in range(count)],
+        [round(rng.uniform(1, 500), 2) for _ in range(count)],
+        [rng.choice([0, rng.randint(1, 50)]) for _ in range(count)],
+    )
+
+
+class TestExpenseAllocation(FrappeTestCase):
+    def test_allocation_sums_to_the_total(self):
+        rng = random.Random(1)
+        for total in (0.01, 1, 100, 12345.67, 99999.99):
+            weights = [rng.uniform(0, 1000) for _ in range(37)]
+            shares = allocate_largest_remainder(weights, total)
+            self.assertEqual(to_units(shares), int(round(total * 100)))
+
+    def test_allocation_with_equal_weights_gives_extra_units_to_earlier_rows(self):
+        self.assertEqual(allocate_largest_remainder([1, 1, 1], 0.1), [0.04, 0.03, 0.03])
+
+    def test_half_unit_total_is_rounded_up(self):
+        self.assertEqual(allocate_largest_remainder([1], 0.005), [0.01])
+        self.assertEqual(allocate_largest_remainder([1, 1], 0.015), [0.01, 0.01])
+
+    def test_qty_zero_rows_get_no_expense(self):
+        rates, expense_amounts = calculate_item_rates(
+            [10, 0, 0], [0, 20, 0], [0, 0, 30], [1, 0, 3], total_expenses=100
+        )
+        self.assertEqual(expense_amounts[1], 0)
+        self.assertEqual(rates[1], 20)
+        self.assertEqual(to_units(expense_amounts), 10000)
+        self.assertAlmostEqual(rates[0], 10 + expense_amounts[0])
+        self.assertAlmostEqual(rates[2], 30 + expense_amounts[2] / 3)
+
+    def test_zero_total_leaves_rates_unchanged(self):
+        rates, expense_amounts = calculate_item_rates(
+            [10, 0], [0, 20], [5, 5], [2, 3], total_expenses=0, margin=10
+        )
+        self.assertEqual(expense_amounts, [0, 0])
+        self.assertEqual(rates, [11, 22])
+
+    def test_zero_item_amount_leaves_rates_unchanged(self):
+        rates, expense_amounts = calculate_item_rates(
+            [10, 20], [0, 0], [0, 0], [0, 0], total_expenses=50
+        )
+        self.assertEqual(expense_amounts, [0, 0])
+        self.assertEqual(rates, [10, 20])
+
+    @unittest.skipIf(expense_allocation.np is None, "NumPy is not installed")
+    def test_numpy_and_python_paths_match(self):
+        for count, total, margin, precision in ((10, 100, 0, 2), (750, 12345.67, 15, 2), (2000, 0.5, 5, 3)):
+            supplier_rates, price_list_rates, rates, qtys = make_rows(count)
+            args = (supplier_rates, price_list_rates, rates, qtys, total, margin, precision)
+
+            with patch.object(expense_allocation, "NUMPY_MIN_ROWS", 0):
+                numpy_result = calculate_item_rates(*args)
+            with patch.object(expense_allocation, "np", None):
+                python_result = calculate_item_rates(*args)
+
+            self.assertEqual(numpy_result, python_result)
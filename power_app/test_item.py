@@ -0,0 +1,54 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now
+
+from power_app.item import ITEM_RATE_CACHE_KEY, update_item_rate_cache
+
+ITEM_CODES = ("_Test PA Rate Item 1", "_Test PA Rate Item 2", "_Test PA Rate Item 3")
+OTHER_ITEM_CODE = "_Test PA Rate Item 4"
+
+
+def make_invoice(doctype, item_codes, rate=0):
+    return frappe._dict(
+        doctype=doctype,
+        creation=now(),
+        supplier_name="_Test PA Supplier",
+        items=[frappe._dict(item_code=item_code, rate=rate) for item_code in item_codes],
+    )
+
+
+class TestItemRateCache(FrappeTestCase):
+    def setUp(self):
+        for item_code in (*ITEM_CODES, OTHER_ITEM_CODE):
+            frappe.cache.hset(ITEM_RATE_CACHE_KEY, item_code, {
+                "item_code": item_code,
+                "last_purchase_rate": 10,
+                "supplier": "",
+                "last_selling_rate": 20,
+                "purchase_creation": None,
+                "selling_creation": None,
+            })
+
+    def tearDown(self):
+        frappe.cache.hdel(ITEM_RATE_CACHE_KEY, [*ITEM_CODES, OTHER_ITEM_CODE])
+
+    def test_cancel_drops_every_item_of_the_invoice(self):
+        update_item_rate_cache(make_invoice("Sales Invoice", ITEM_CODES), "on_cancel")
+        frappe.db.after_commit.run()
+
+        for item_code in ITEM_CODES:
+            self.assertIsNone(frappe.cache.hget(ITEM_RATE_CACHE_KEY, item_code))
+        self.assertIsNotNone(frappe.cache.hget(ITEM_RATE_CACHE_KEY, OTHER_ITEM_CODE))
+
+    def test_submit_writes_rates_through(self):
+        update_item_rate_cache(make_invoice("Purchase Invoice", ITEM_CODES, rate=15), "on_submit")
+        frappe.db.after_commit.run()
+
+        for item_code in ITEM_CODES:
+            entry = frappe.cache.hget(ITEM_RATE_CACHE_KEY, item_code)
+            self.assertEqual(entry["last_purchase_rate"], 15)
+            self.assertEqual(entry["supplier"], "_Test PA Supplier")
+        self.assertEqual(frappe.cache.hget(ITEM_RATE_CACHE_KEY, OTHER_ITEM_CODE)["last_purchase_rate"], 10)
@@ -0,0 +1,88 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+import random
+import unittest
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from power_app import landed_cost_voucher
+from power_app.benchmarks.landed_cost_distribution import erpnext_loop
+from power_app.landed_cost_voucher import distribute_charges
+
+LEGACY_ROUNDING = "Banker's Rounding (legacy)"
+
+
+def make_basis(count, seed=3):
+    rng = random.Random(seed)
+    return [round(rng.uniform(0.5, 2500), 2) for _ in range(count)]
+
+
+@unittest.skipIf(landed_cost_voucher.np is None, "NumPy is not installed")
+class TestRoundArray(FrappeTestCase):
+    def setUp(self):
+        patcher = patch.object(frappe, "get_system_settings", return_value=LEGACY_ROUNDING)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertMatchesFlt(self, values, precision):
+        np = landed_cost_voucher.np
+        self.assertEqual(
+            landed_cost_voucher._round_array(np.asarray(values, dtype=float), precision),
+            [flt(value, precision) for value in values],
+        )
+
+    def test_exact_halves(self):
+        # Even/odd neighbours at precision 0, .5 in the last place at 2 and 3
+        self.assertMatchesFlt([0.5, 1.5, 2.5, 3.5, -0.5, -1.5, 10.5], 0)
+        self.assertMatchesFlt([0.005, 0.015, 0.025, 0.125, 1.005, 2.675, 0.025 * 3], 2)
+        self.assertMatchesFlt([0.0005, 0.0015, 0.0025, 1.2345, 9.9995], 3)
+
+    def test_random_values(self):
+        rng = random.Random(11)
+        values = [rng.uniform(-1000, 1000) for _ in range(2000)]
+        for precision in (0, 2, 3):
+            self.assertMatchesFlt(values, precision)
+
+
+class TestDistributeCharges(FrappeTestCase):
+    def setUp(self):
+        patcher = patch.object(frappe, "get_system_settings", return_value=LEGACY_ROUNDING)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matches_erpnext(self):
+        cases = (
+            (make_basis(50), 98765.43, 2),
+            (make_basis(800), 98765.43, 2),
+            (make_basis(800), 1234.5678, 3),
+            (make_basis(800), 4321, 0),
+            # Every share is an exact half at precision 2
+            ([1] * 1000, 25, 2),
+        )
+        for basis, total_charges, precision in cases:
+            with self.subTest(rows=len(basis), precision=precision):
+                self.assertEqual(
+                    distribute_charges(basis, total_charges, precision),
+                    erpnext_loop(basis, total_charges, precision),
+                )
+
+    def test_rounding_difference_goes_to_the_last_row(self):
+        # 10 / 3 = 3.333..., rounded shares sum to 9.99
+        charges = distribute_charges([1, 1, 1], 10, 2)
+        self.assertEqual(charges[:-1], [3.33, 3.33])
+        self.assertAlmostEqual(charges[-1], 3.34)
+        self.assertAlmostEqual(sum(charges), 10)
+
+    @unittest.skipIf(landed_cost_voucher.np is None, "NumPy is not installed")
+    def test_numpy_and_python_paths_match(self):
+        basis = make_basis(600)
+        for precision in (0, 2, 3):
+            numpy_charges = distribute_charges(basis, 98765.43, precision)
+            with patch.object(landed_cost_voucher, "NUMPY_MIN_ROWS", len(basis) + 1):
+                python_charges = distribute_charges(basis, 98765.43, precision)
+
+            self.assertEqual(numpy_charges, python_charges)
@@ -0,0 +1,161 @@
+# Copyright (c) 2025, Power App and contributors
+# For license information, please see license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from power_app import offer_selection
+from power_app.offer_selection import EARLIEST_DELIVERY, select_best_offers
+from power_app.quotation import auto_select_supplier_quotation_items
+
+
+def make_offer(name, item_code, rate, uom="Nos", conversion_factor=1, **kwargs):
+    offer = frappe._dict(
+        supplier_quotation_item=name,
+        supplier_quotation=f"SQ-{name}",
+        item_code=item_code,
+        item_name=item_code,
+        qty=1,
+        uom=uom,
+        conversion_factor=conversion_factor,
+        currency="USD",
+        rate=rate,
+        valid_till=None,
+        delivery_time=None,
+    )
+    offer.update(kwargs)
+    return offer
+
+
+class FakeQuotation:
+    """Draft Quotation with the parts auto_select_supplier_quotation_items uses"""
+
+    def __init__(self, items):
+        self.name = "QTN-TEST"
+        self.currency = "USD"
+        self.docstatus = 0
+        self.items = items
+
+    def precision(self, fieldname, parentfield=None):
+        return 2
+
+    def append(self, fieldname, row):
+        row = frappe._dict(name=None, conversion_factor=None, **row)
+        self.items.append(row)
+        return row
+
+    def save(self, ignore_permissions=False):
+        pass
+
+
+class TestOfferSelection(FrappeTestCase):
+    def setUp(self):
+        for name, value in (
+            ("get_expense_factors", {}),
+            ("get_exchange_rates", {"USD": 1.0}),
+        ):
+            patcher = patch.object(offer_selection, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def select(self, offers, **kwargs):
+        quotation = frappe._dict(name="QTN-TEST", currency="USD")
+        with patch.object(offer_selection, "get_offers", return_value=offers):
+            return select_best_offers(quotation, **kwargs)
+
+    def test_offers_are_compared_per_stock_unit(self):
+        # A box of 12 at 120 is 10 per unit, cheaper than 11 per piece
+        selection = self.select([
+            make_offer("SQI-1", "ITEM-A", 11),
+            make_offer("SQI-2", "ITEM-A", 120, uom="Box", conversion_factor=12),
+        ])
+
+        pick = selection.picks["ITEM-A"]
+        self.assertEqual(pick.supplier_quotation_item, "SQI-2")
+        self.assertEqual(pick.stock_rate, 10)
+
+    def test_expired_offers_are_skipped(self):
+        selection = self.select(
+            [
+                make_offer("SQI-1", "ITEM-A", 5, valid_till="2025-01-01"),
+                make_offer("SQI-2", "ITEM-A", 8),
+            ],
+            on_date="2025-06-01",
+        )
+
+        self.assertEqual(selection.expired, 1)
+        self.assertEqual(selection.picks["ITEM-A"].supplier_quotation_item, "SQI-2")
+
+    def test_earliest_delivery_policy(self):
+        selection = self.select(
+            [
+                make_offer("SQI-1", "ITEM-A", 5, delivery_time="2025-03-01"),
+                make_offer("SQI-2", "ITEM-A", 8, delivery_time="2025-02-01"),
+                make_offer("SQI-3", "ITEM-A", 1),
+            ],
+            policy=EARLIEST_DELIVERY,
+        )
+
+        self.assertEqual(selection.picks["ITEM-A"].supplier_quotation_item, "SQI-2")
+
+
+class TestAutoSelectUOM(FrappeTestCase):
+    """Auto-selected rates follow the UOM of every row they are written to"""
+
+    def setUp(self):
+        self.quotation = FakeQuotation([
+            frappe._dict(name="QI-1", item_code="ITEM-A", qty=24, uom="Nos", conversion_factor=1),
+            frappe._dict(name="QI-2", item_code="ITEM-A", qty=2, uom="Box", conversion_factor=12),
+        ])
+        # One Material Request line merged from both Quotation rows, quoted per Box
+        self.offers = [
+            make_offer("SQI-A", "ITEM-A", 60, uom="Box", conversion_factor=12),
+            make_offer("SQI-B", "ITEM-B", 30, uom="Pack", conversion_factor=6),
+        ]
+        tables = {
+            "Supplier Quotation Item": [
+                frappe._dict(name="SQI-A", description="A", material_request_item="MRI-A"),
+                frappe._dict(name="SQI-B", description="B", material_request_item=None),
+            ],
+            "Item": [["ITEM-A", "Item A"], ["ITEM-B", "Item B"]],
+            "Material Request Item": [
+                frappe._dict(name="MRI-A", custom_quotation_items=json.dumps(["QI-1", "QI-2"])),
+            ],
+        }
+
+        for target, name, kwargs in (
+            (frappe, "has_permission", {"return_value": True}),
+            (frappe, "get_doc", {"return_value": self.quotation}),
+            (frappe, "get_all", {"side_effect": lambda doctype, **_: tables[doctype]}),
+            (offer_selection, "get_offers", {"return_value": self.offers}),
+            (offer_selection, "get_expense_factors", {"return_value": {}}),
+            (offer_selection, "get_exchange_rates", {"return_value": {"USD": 1.0}}),
+        ):
+            patcher = patch.object(target, name, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_every_matched_row_gets_the_rate_in_its_own_uom(self):
+        result = auto_select_supplier_quotation_items("QTN-TEST")
+
+        self.assertEqual(result["items_updated"], 2)
+        self.assertEqual(result["items_added"], 1)
+
+        rows = {row.name: row for row in self.quotation.items}
+        # 60 per Box of 12 is 5 per Nos
+        self.assertEqual(rows["QI-1"].rate, 5)
+        self.assertEqual(rows["QI-1"].amount, 120)
+        self.assertEqual(rows["QI-2"].rate, 60)
+        self.assertEqual(rows["QI-2"].amount, 120)
+        self.assertEqual(rows["QI-2"].custom_supplier_quotation, "SQ-SQI-A")
+
+    def test_new_row_uses_the_offer_uom(self):
+        auto_select_supplier_quotation_items("QTN-TEST")
+
+        new_row = self.quotation.items[-1]
+        self.assertEqual(new_row.item_code, "ITEM-B")
+        self.assertEqual(new_row.uom, "Pack")
+        self.assertEqual(new_row.rate, 30)